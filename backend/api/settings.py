@@ -50,6 +50,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     # user installed
     "lore",  # makes Django aware of this
     "django.contrib.sites",
@@ -126,6 +127,27 @@ DATABASES = {
         conn_max_age=600
     )
 }
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+#
+# Set CACHE_URL to pick the backend:
+#   locmemcache://                 memory of each worker (default)
+#   filecache:///var/tmp/lore      files shared by the workers of one host
+#   redis://localhost:6379/0       any Redis compatible server, requires the
+#                                  `redis` package
+# Group versions are bumped in the cache, so a per worker cache only stays
+# consistent when running a single worker.
+
+CACHES = {
+    "default": env.cache_url("CACHE_URL", default="locmemcache://"),
+}
+
+# Seconds the group ids of a user are cached across requests. They are
+# always loaded at most once per request, and 0 keeps them to that. Only
+# enable this with a cache shared by all workers, since memberships are
+# invalidated in the cache of the worker that changed them.
+MEMBERSHIP_CACHE_TIMEOUT = env.int("MEMBERSHIP_CACHE_TIMEOUT", default=0)
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -226,6 +248,10 @@ REST_FRAMEWORK = {
         "rest_framework.pagination.PageNumberPagination"
     ),
     "PAGE_SIZE": 20,
+    "DEFAULT_RENDERER_CLASSES": [
+        "lore.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
     ],
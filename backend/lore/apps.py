@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class LoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "lore"
+
+    def ready(self) -> None:
+        """Connect the signal handlers and register the background jobs."""
+        from lore import deletion, signals  # noqa: F401
@@ -0,0 +1,222 @@
+"""Response caching keyed on per-group versions.
+
+Every group has a version number in the cache that is bumped whenever one
+of its items is created, updated or deleted. Cached responses are keyed on
+the versions of the groups they read from, so they stay valid until one of
+those groups changes and never need to be deleted explicitly.
+
+The same versions make up the ETags of those responses, so conditional
+requests are answered without serializing anything.
+
+The ids of the groups a user is a member of are loaded once per request
+and used by every membership check. They can also be cached across
+requests, in which case they are deleted whenever the memberships change.
+"""
+
+import hashlib
+import time
+import typing
+from collections.abc import Callable, Iterable
+from typing import Any, cast
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import parse_etags
+from rest_framework.exceptions import ParseError
+from rest_framework.response import Response
+from rest_framework.status import HTTP_200_OK, HTTP_304_NOT_MODIFIED
+
+if typing.TYPE_CHECKING:
+    from rest_framework.request import Request
+
+    from lore.models import LoreUser
+
+GROUP_VERSION_KEY = "lore:group-version:{}"
+RESPONSE_KEY = "lore:response:{}"
+MEMBERSHIP_KEY = "lore:memberships:{}"
+
+
+def new_version() -> int:
+    """Create a version that differs from every version previously issued.
+
+    Versions may be evicted from the cache, so starting again from a
+    constant could make stale responses valid again.
+    """
+    return time.time_ns()
+
+
+def get_group_versions(group_ids: Iterable[int]) -> list[int]:
+    """Get the current version of each group."""
+    keys = [GROUP_VERSION_KEY.format(pk) for pk in group_ids]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, new_version(), timeout=None)
+            versions[key] = cache.get(key, new_version())
+    return [versions[key] for key in keys]
+
+
+def bump_group_version(group_id: int) -> None:
+    """Invalidate the cached responses of the group once the write commits."""
+
+    def bump() -> None:
+        key = GROUP_VERSION_KEY.format(group_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, new_version(), timeout=None)
+
+    transaction.on_commit(bump)
+
+
+def get_user_group_ids(user: "LoreUser") -> frozenset[int]:
+    """Get the ids of the groups the user is a member of.
+
+    The ids are kept on the user, which lives as long as the request, and
+    in the cache if `MEMBERSHIP_CACHE_TIMEOUT` is set.
+    """
+    if hasattr(user, "_group_ids"):
+        return user._group_ids
+
+    timeout = settings.MEMBERSHIP_CACHE_TIMEOUT
+    key = MEMBERSHIP_KEY.format(user.pk)
+    group_ids = cache.get(key) if timeout else None
+    if group_ids is None:
+        memberships = user.member_of.through.objects.filter(loreuser=user)
+        group_ids = frozenset(
+            memberships.values_list("loregroup_id", flat=True),
+        )
+        if timeout:
+            cache.set(key, group_ids, timeout=timeout)
+    user._group_ids = group_ids
+    return group_ids
+
+
+def invalidate_user_group_ids(user_ids: Iterable[int]) -> None:
+    """Delete the cached group ids of the users once the write commits."""
+    if not settings.MEMBERSHIP_CACHE_TIMEOUT:
+        return
+    keys = [MEMBERSHIP_KEY.format(pk) for pk in user_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def forget_user_group_ids(user: "LoreUser") -> None:
+    """Reload the group ids of the user on the next membership check.
+
+    Only drops the ids kept on the user, the cached ids are invalidated by
+    the membership signals.
+    """
+    user.__dict__.pop("_group_ids", None)
+
+
+def get_group_etag(request: "Request", group_ids: Iterable[int]) -> str:
+    """Build a strong ETag for a response that reads from the groups.
+
+    The tag covers the user, since serializers add per user fields, the full
+    url, which covers the query parameters and the host used by hyperlinks,
+    and the version of every group.
+    """
+    group_ids = sorted(group_ids)
+    versions = get_group_versions(group_ids)
+    digest = hashlib.md5(  # noqa: S324 not used for security
+        repr(
+            (request.user.pk, request.build_absolute_uri(), group_ids, versions),
+        ).encode(),
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def get_conditional_response(
+    request: "Request",
+    etag: str,
+    get_response: Callable[[], Response],
+) -> Response:
+    """Answer with a 304 if the client has the current version.
+
+    Otherwise, create the response and attach the ETag to it.
+    """
+    if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+    if etag in if_none_match or "*" in if_none_match:
+        return Response(status=HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    response = get_response()
+    if response.status_code == HTTP_200_OK:
+        response["ETag"] = etag
+    return response
+
+
+def get_cached_response(
+    request: "Request",
+    group_ids: Iterable[int],
+    get_response: Callable[[], Response],
+) -> Response:
+    """Get the response from the cache, or create and cache it.
+
+    Conditional requests for the current version are answered with a 304.
+    """
+    etag = get_group_etag(request, group_ids)
+    key = RESPONSE_KEY.format(etag)
+
+    def get_cached() -> Response:
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = get_response()
+        if response.status_code == HTTP_200_OK:
+            cache.set(key, response.data)
+        return response
+
+    return get_conditional_response(request, etag, get_cached)
+
+
+class GroupCacheMixin:
+    """Cache the responses of a group item viewset.
+
+    List responses are cached, and both list and retrieve responses carry an
+    ETag so clients can make conditional requests.
+
+    Nested list routes read from the route's group, while top level list
+    routes read from all of the user's groups.
+    """
+
+    def get_object_group_id(self, obj: Any) -> int:
+        """Get the id of the group the object belongs to."""
+        return obj.group_id
+
+    def list(self, request: "Request", *args: Any, **kwargs: Any) -> Response:
+        """List the items, using the cached response if it is current."""
+        group_pk = self.kwargs.get("loregroup_pk")
+        if group_pk is None:
+            group_ids = get_user_group_ids(cast("LoreUser", request.user))
+        else:
+            try:
+                group_ids = [int(group_pk)]
+            except ValueError as e:
+                msg = "Expected an integer group id."
+                raise ParseError(msg) from e
+        return get_cached_response(
+            request,
+            group_ids,
+            lambda: super(GroupCacheMixin, self).list(
+                request,
+                *args,
+                **kwargs,
+            ),
+        )
+
+    def retrieve(
+        self,
+        request: "Request",
+        *args: Any,  # noqa: ARG002
+        **kwargs: Any,  # noqa: ARG002
+    ) -> Response:
+        """Retrieve the item, skipping serialization if it is not modified."""
+        obj = self.get_object()
+        etag = get_group_etag(request, [self.get_object_group_id(obj)])
+        return get_conditional_response(
+            request,
+            etag,
+            lambda: Response(self.get_serializer(obj).data),
+        )
@@ -0,0 +1,230 @@
+"""Background deletion of soft deleted groups and users.
+
+Deleting a group or a user cascades to all of their items, which Django
+loads in memory before deleting them in one transaction. Instead, groups
+and users are soft deleted in the request, which hides them right away,
+and purged later: their items are deleted in batches, each in a short
+transaction, and the files of each batch are removed from the storage in
+bulk once the batch is committed.
+
+Soft deleting a group or a user enqueues its purge as a background job.
+The `purge_deleted` command purges whatever is left over, such as groups
+deleted before the job queue existed.
+"""
+
+import contextlib
+import itertools
+from collections.abc import Iterable, Iterator
+from contextvars import ContextVar
+
+from django.core.files.storage import Storage
+from django.db import models, transaction
+from storages.utils import clean_name, safe_join
+
+from lore.cache import bump_group_version
+from lore.jobs import register, renew_lease
+from lore.models import (
+    Achievement,
+    Challenge,
+    ChallengeParticipant,
+    GroupItem,
+    Image,
+    LoreGroup,
+    LoreUser,
+    Quote,
+    Tombstone,
+)
+
+PURGE_BATCH_SIZE = 500
+# The most keys S3 deletes in a single request.
+MAX_DELETE_OBJECTS = 1000
+
+# Challenges are deleted before the achievements they grant.
+GROUP_ITEM_MODELS: list[type[GroupItem]] = [
+    Challenge,
+    Achievement,
+    Quote,
+    Image,
+]
+
+# Groups whose items are being purged, so no tombstones are recorded.
+_purging_group_ids: ContextVar[frozenset[int]] = ContextVar(
+    "purging_group_ids",
+    default=frozenset(),
+)
+
+
+def is_group_purging(group_id: int) -> bool:
+    """Return true if the items of the group are being purged."""
+    return group_id in _purging_group_ids.get()
+
+
+@contextlib.contextmanager
+def purging_group(group_id: int) -> Iterator[None]:
+    """Mark the group as being purged for the duration of the block."""
+    token = _purging_group_ids.set(_purging_group_ids.get() | {group_id})
+    try:
+        yield
+    finally:
+        _purging_group_ids.reset(token)
+
+
+def delete_files(storage: Storage, names: Iterable[str | None]) -> None:
+    """Delete the files from the storage.
+
+    S3 storages delete up to a thousand files per request, other storages
+    delete them one at a time.
+    """
+    names = [name for name in names if name]
+    bucket = getattr(storage, "bucket", None)
+    if bucket is None:
+        for name in names:
+            storage.delete(name)
+        return
+    for chunk in itertools.batched(names, MAX_DELETE_OBJECTS):
+        bucket.delete_objects(
+            Delete={
+                "Objects": [
+                    # matches the keys of `S3Storage`
+                    {"Key": safe_join(storage.location, clean_name(name))}
+                    for name in chunk
+                ],
+                "Quiet": True,
+            },
+        )
+
+
+def delete_in_batches(
+    queryset: models.QuerySet,
+    batch_size: int,
+) -> Iterator[list[int]]:
+    """Delete the rows of the queryset a batch at a time.
+
+    Each batch is deleted in its own transaction, after which the files of
+    its rows are deleted and the lease of the running job is renewed.
+    Yields the primary keys of each deleted batch.
+    """
+    file_fields = [
+        field
+        for field in queryset.model._meta.concrete_fields
+        if isinstance(field, models.FileField)
+    ]
+    while True:
+        with transaction.atomic():
+            rows = list(
+                queryset.order_by("pk").values_list(
+                    "pk",
+                    *(field.attname for field in file_fields),
+                )[:batch_size],
+            )
+            if not rows:
+                return
+            pks = [row[0] for row in rows]
+            queryset.model._default_manager.filter(pk__in=pks).delete()
+            for i, field in enumerate(file_fields, start=1):
+                names = [row[i] for row in rows]
+                transaction.on_commit(
+                    lambda field=field, names=names: delete_files(
+                        field.storage,
+                        names,
+                    ),
+                )
+        renew_lease()
+        yield pks
+
+
+def purge_group(group: LoreGroup, batch_size: int = PURGE_BATCH_SIZE) -> int:
+    """Delete a soft deleted group with its items and files.
+
+    No tombstones are recorded for the items, since the group is gone.
+    Returns the number of deleted items.
+    """
+    deleted = 0
+    with purging_group(group.pk):
+        for model in GROUP_ITEM_MODELS:
+            items = model._default_manager.filter(group=group)
+            for pks in delete_in_batches(items, batch_size):
+                deleted += len(pks)
+        for _ in delete_in_batches(
+            Tombstone.tombstones.filter(group=group),
+            batch_size,
+        ):
+            pass
+        for _ in delete_in_batches(
+            LoreGroup.groups.filter(pk=group.pk),
+            batch_size,
+        ):
+            pass
+    return deleted
+
+
+def purge_user(user: LoreUser, batch_size: int = PURGE_BATCH_SIZE) -> int:
+    """Delete a soft deleted user with their quotes and files.
+
+    The quotes are removed from live groups, so their deletion is recorded
+    for syncing clients and the caches of their groups are invalidated.
+    Returns the number of deleted quotes.
+    """
+    deleted = 0
+    quotes = Quote.quotes.filter(said_by=user)
+    for group_id in quotes.values_list("group", flat=True).distinct():
+        for pks in delete_in_batches(
+            quotes.filter(group=group_id),
+            batch_size,
+        ):
+            deleted += len(pks)
+            bump_group_version(group_id)
+
+    # achievements and challenges keep their counts in sync with triggers
+    for queryset, group_field in [
+        (
+            Achievement.achieved_by.through.objects.filter(loreuser=user),
+            "achievement__group",
+        ),
+        (
+            ChallengeParticipant.objects.filter(lore_user=user),
+            "challenge__group",
+        ),
+    ]:
+        group_ids = set(queryset.values_list(group_field, flat=True))
+        for _ in delete_in_batches(queryset, batch_size):
+            pass
+        for group_id in group_ids:
+            bump_group_version(group_id)
+
+    for _ in delete_in_batches(
+        LoreUser.users.filter(pk=user.pk),
+        batch_size,
+    ):
+        pass
+    return deleted
+
+
+@register("purge_group")
+def purge_group_job(group_id: int) -> None:
+    """Purge the group, unless it was purged already."""
+    group = LoreGroup.groups.filter(pk=group_id, deleted__isnull=False).first()
+    if group is not None:
+        purge_group(group)
+
+
+@register("purge_user")
+def purge_user_job(user_id: int) -> None:
+    """Purge the user, unless they were purged already."""
+    user = LoreUser.users.filter(pk=user_id, deleted__isnull=False).first()
+    if user is not None:
+        purge_user(user)
+
+
+def purge_deleted(batch_size: int = PURGE_BATCH_SIZE) -> tuple[int, int]:
+    """Purge every soft deleted group and user.
+
+    Returns the number of purged groups and users.
+    """
+    groups = list(LoreGroup.groups.filter(deleted__isnull=False))
+    for group in groups:
+        purge_group(group, batch_size)
+    users = list(LoreUser.users.filter(deleted__isnull=False))
+    for user in users:
+        purge_user(user, batch_size)
+    return len(groups), len(users)
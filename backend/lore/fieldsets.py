@@ -0,0 +1,78 @@
+"""Sparse fieldsets selected with the `fields` and `omit` query parameters.
+
+`?fields=id,text` limits a response to the listed fields, and `?omit=url`
+removes the listed fields. Both take comma separated field names, unknown
+names are ignored, and the id is always included so items can be told
+apart.
+
+Fields are dropped from serializers before anything is computed, and
+viewsets use `is_field_requested` to skip the joins and annotations only
+omitted fields read. Only reads are affected, writes always validate and
+return every field.
+"""
+
+from collections.abc import Iterable
+
+from rest_framework import permissions, serializers
+from rest_framework.request import Request
+
+FIELDS_PARAM = "fields"
+OMIT_PARAM = "omit"
+
+
+def parse_field_names(value: str) -> set[str]:
+    """Split a comma separated list of field names."""
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+def get_sparse_fields(
+    request: Request | None,
+    field_names: Iterable[str],
+) -> list[str] | None:
+    """Get the requested fields, in the order of `field_names`.
+
+    Returns None if the request does not select fields.
+    """
+    if request is None or request.method not in permissions.SAFE_METHODS:
+        return None
+    query_params = getattr(request, "query_params", request.GET)
+    if FIELDS_PARAM not in query_params and OMIT_PARAM not in query_params:
+        return None
+
+    field_names = list(field_names)
+    if FIELDS_PARAM in query_params:
+        selected = parse_field_names(query_params[FIELDS_PARAM])
+        selected.add("id")
+        field_names = [name for name in field_names if name in selected]
+    if OMIT_PARAM in query_params:
+        omitted = parse_field_names(query_params[OMIT_PARAM]) - {"id"}
+        field_names = [name for name in field_names if name not in omitted]
+    return field_names
+
+
+def is_field_requested(request: Request | None, field_name: str) -> bool:
+    """Return true if the field is part of the response to the request."""
+    sparse_fields = get_sparse_fields(request, [field_name])
+    return sparse_fields is None or field_name in sparse_fields
+
+
+class SparseFieldsMixin:
+    """Drop the fields of a serializer that the request did not select.
+
+    Only the top level serializer of a response is affected, nested
+    serializers keep all of their fields.
+    """
+
+    def get_fields(self) -> dict[str, serializers.Field]:
+        """Build the fields selected by the request."""
+        fields = super().get_fields()
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        if parent is not None:
+            return fields
+
+        sparse_fields = get_sparse_fields(self.context.get("request"), fields)
+        if sparse_fields is None:
+            return fields
+        return {name: fields[name] for name in sparse_fields}
@@ -0,0 +1,272 @@
+"""Bulk import of quotes from chat exports and JSON lines files.
+
+Uploads are read a line at a time and quotes are created in batches, so
+imports of any size run in constant memory and a few queries per batch.
+Speakers are resolved against the group's members once per import.
+
+Two formats are supported:
+
+- `jsonl`: one JSON object per line, with a `text` and a `said_by`, which
+  is the id or the full name of a member. `context` and `pinned` are
+  optional.
+- `chat`: a chat export with one message per line, like
+  `12/31/20, 21:15 - Ada Lovelace: Hello` or
+  `[12/31/20, 21:15:03] Ada Lovelace: Hello`. Lines that do not start a
+  message continue the previous one, and timestamped lines without a
+  speaker, like `12/31/20, 21:16 - Ada added Alan`, are skipped.
+
+Lines that cannot be imported, such as messages of unknown speakers, are
+skipped and reported.
+"""
+
+import itertools
+import json
+import re
+from collections.abc import Iterable, Iterator
+from typing import Any, NamedTuple
+
+from lore.models import LoreGroup, LoreUser, Quote
+
+IMPORT_FORMATS = ("jsonl", "chat")
+IMPORT_BATCH_SIZE = 1000
+# Skipped lines past this many are counted but not described.
+MAX_REPORTED_ERRORS = 100
+
+# The date and time a chat export starts each message with.
+CHAT_TIMESTAMP = (
+    r"\d{1,4}[./-]\d{1,2}[./-]\d{1,4},?\s+"
+    r"\d{1,2}[:.]\d{2}(?:[:.]\d{2})?(?:\s?[AaPp]\.?\s?[Mm]\.?)?"
+)
+# The timestamp of a message, in brackets or followed by a dash.
+CHAT_TIMESTAMP_RE = re.compile(
+    rf"^(?:\[{CHAT_TIMESTAMP}\]\s*|{CHAT_TIMESTAMP}\s+-\s+)",
+)
+# The speaker and text of a message, after its timestamp if any.
+CHAT_MESSAGE_RE = re.compile(
+    r"^(?P<speaker>[^:\[\]]{1,65}?):\s?(?P<text>.*)$",
+)
+
+
+class ImportedQuote(NamedTuple):
+    """A quote read from an upload, before its speaker is resolved."""
+
+    line: int
+    text: str
+    speaker: str | int | None
+    context: str = ""
+    pinned: bool = False
+
+
+class QuoteImportError(ValueError):
+    """Raised for a line of an upload that cannot be imported."""
+
+    def __init__(self, line: int, message: str) -> None:
+        """Record the line number with the message."""
+        super().__init__(message)
+        self.line = line
+
+
+class Speakers:
+    """The members of a group, looked up by id or by full name."""
+
+    def __init__(self, group: LoreGroup) -> None:
+        """Load the ids and names of every member at once."""
+        self.ids: set[int] = set()
+        self.names: dict[str, int] = {}
+        members = LoreUser.users.filter(member_of=group).values_list(
+            "pk",
+            "first_name",
+            "last_name",
+        )
+        for pk, first_name, last_name in members:
+            self.ids.add(pk)
+            # matches `AbstractUser.get_full_name`
+            self.names[normalize_name(f"{first_name} {last_name}")] = pk
+
+    def resolve(self, speaker: str | int | None) -> int | None:
+        """Get the id of the member, or None if nobody matches."""
+        if isinstance(speaker, int):
+            return speaker if speaker in self.ids else None
+        if isinstance(speaker, str):
+            return self.names.get(normalize_name(speaker))
+        return None
+
+    def is_known(self, name: str) -> bool:
+        """Return true if the name is the full name of a member."""
+        return normalize_name(name) in self.names
+
+
+def normalize_name(name: str) -> str:
+    """Compare names ignoring case and repeated whitespace."""
+    return " ".join(name.split()).casefold()
+
+
+def decode_lines(lines: Iterable[bytes]) -> Iterator[tuple[int, str]]:
+    """Decode and number the lines of an upload.
+
+    Raises a QuoteImportError if a line is not valid UTF-8.
+    """
+    for number, raw in enumerate(lines, start=1):
+        try:
+            line = raw.decode("utf-8")
+        except UnicodeDecodeError as e:
+            msg = "Expected UTF-8 text."
+            raise QuoteImportError(number, msg) from e
+        if number == 1:
+            line = line.removeprefix("\ufeff")
+        yield number, line.rstrip("\r\n")
+
+
+def parse_jsonl(
+    lines: Iterable[tuple[int, str]],
+) -> Iterator[ImportedQuote | QuoteImportError]:
+    """Read a quote from every non blank line of a JSON lines file."""
+    for number, line in lines:
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError:
+            yield QuoteImportError(number, "Expected a JSON object.")
+            continue
+        if not isinstance(data, dict):
+            yield QuoteImportError(number, "Expected a JSON object.")
+            continue
+        text, context = data.get("text"), data.get("context") or ""
+        pinned = data.get("pinned", False)
+        if not isinstance(text, str) or not isinstance(context, str):
+            msg = "Expected the text and context to be strings."
+            yield QuoteImportError(number, msg)
+        elif not isinstance(pinned, bool):
+            msg = "Expected pinned to be a boolean."
+            yield QuoteImportError(number, msg)
+        else:
+            yield ImportedQuote(
+                number,
+                text,
+                data.get("said_by"),
+                context,
+                pinned,
+            )
+
+
+def parse_chat(
+    lines: Iterable[tuple[int, str]],
+    speakers: Speakers,
+) -> Iterator[ImportedQuote]:
+    """Read a quote from every message of a chat export.
+
+    A line starts a message if it has a timestamp, or if it is prefixed
+    with the name of a member. Other lines, including those starting with
+    an unknown name and a colon, continue the previous message. Timestamped
+    lines without a speaker, such as system messages, end the previous
+    message and are skipped with the lines that continue them.
+    """
+    message: ImportedQuote | None = None
+    for number, line in lines:
+        timestamp = CHAT_TIMESTAMP_RE.match(line)
+        text = line[timestamp.end() :] if timestamp is not None else line
+        match = CHAT_MESSAGE_RE.match(text)
+        if timestamp is not None or (
+            match is not None and speakers.is_known(match["speaker"])
+        ):
+            if message is not None:
+                yield message
+            message = None
+            if match is not None:
+                message = ImportedQuote(
+                    number,
+                    match["text"],
+                    match["speaker"].strip(),
+                )
+        elif message is not None:
+            message = message._replace(text=f"{message.text}\n{line}")
+    if message is not None:
+        yield message
+
+
+def build_quote(
+    imported: ImportedQuote,
+    group: LoreGroup,
+    speakers: Speakers,
+) -> Quote:
+    """Build the quote, validated like one created through the API.
+
+    Raises a QuoteImportError if the quote is invalid.
+    """
+    text = imported.text.strip()
+    context = imported.context.strip()
+    max_length = Quote._meta.get_field("text").max_length
+    if not text:
+        msg = "Expected a text."
+        raise QuoteImportError(imported.line, msg)
+    if len(text) > max_length or len(context) > max_length:
+        msg = f"Expected at most {max_length} characters."
+        raise QuoteImportError(imported.line, msg)
+    said_by_id = speakers.resolve(imported.speaker)
+    if said_by_id is None:
+        msg = f"Unknown speaker {imported.speaker!r}."
+        raise QuoteImportError(imported.line, msg)
+    return Quote(
+        text=text,
+        context=context,
+        said_by_id=said_by_id,
+        pinned=imported.pinned,
+        group=group,
+    )
+
+
+def import_quotes(
+    group: LoreGroup,
+    lines: Iterable[bytes],
+    import_format: str,
+) -> Iterator[dict[str, Any]]:
+    """Import the quotes of an upload into the group, a batch at a time.
+
+    Yields the progress after every batch, and a final report with the
+    skipped lines. Each batch is committed on its own, so the quotes of
+    earlier batches are kept if the import is interrupted.
+    """
+    speakers = Speakers(group)
+    decoded = decode_lines(lines)
+    parsed: Iterator[ImportedQuote | QuoteImportError]
+    if import_format == "jsonl":
+        parsed = parse_jsonl(decoded)
+    else:
+        parsed = parse_chat(decoded, speakers)
+
+    imported = 0
+    skipped = 0
+    errors: list[dict[str, Any]] = []
+
+    def skip(error: QuoteImportError) -> None:
+        nonlocal skipped
+        skipped += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"line": error.line, "error": str(error)})
+
+    def build_quotes() -> Iterator[Quote]:
+        try:
+            for item in parsed:
+                if isinstance(item, QuoteImportError):
+                    skip(item)
+                    continue
+                try:
+                    yield build_quote(item, group, speakers)
+                except QuoteImportError as e:
+                    skip(e)
+        except QuoteImportError as e:
+            # the rest of the upload cannot be read
+            skip(e)
+
+    for batch in itertools.batched(build_quotes(), IMPORT_BATCH_SIZE):
+        Quote.quotes.bulk_create_quotes(list(batch), group.pk)
+        imported += len(batch)
+        yield {"imported": imported, "skipped": skipped}
+
+    yield {
+        "imported": imported,
+        "skipped": skipped,
+        "errors": errors,
+        "done": True,
+    }
@@ -0,0 +1,134 @@
+"""Background jobs queued in the database.
+
+Jobs are rows of the `Job` table, so they are enqueued in the same
+transaction as the writes that trigger them, and no broker is needed.
+Workers started by `run_lore_worker` claim due jobs with `SELECT ... FOR
+UPDATE SKIP LOCKED`, so any number of them can share the queue.
+
+A job is a function registered under a name, which is called with the
+keyword arguments it was enqueued with:
+
+    @register("purge_group")
+    def purge_group_job(group_id: int) -> None: ...
+
+    Job.jobs.enqueue("purge_group", group_id=group.pk)
+
+A claimed job is leased to its worker. Jobs that run for longer than the
+lease renew it as they make progress with `renew_lease`, otherwise they are
+retried by another worker once the lease expires. A job may therefore run
+more than once, such as when its worker dies after the job committed its
+work, so jobs must be idempotent.
+"""
+
+import logging
+import random
+import traceback
+from collections.abc import Callable
+from contextvars import ContextVar
+from datetime import timedelta
+from typing import Any
+
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from lore.models import Job
+
+logger = logging.getLogger(__name__)
+
+# How long a claimed job may run without renewing its lease before other
+# workers retry it.
+JOB_LEASE = timedelta(minutes=10)
+RETRY_BASE_DELAY = timedelta(seconds=10)
+MAX_RETRY_DELAY = timedelta(hours=6)
+
+JobFunction = Callable[..., Any]
+
+_registry: dict[str, JobFunction] = {}
+
+# The job run by the current worker thread.
+_current_job: ContextVar[Job | None] = ContextVar("current_job", default=None)
+
+
+def register(name: str) -> Callable[[JobFunction], JobFunction]:
+    """Register the decorated function as the job with the name."""
+
+    def decorator(func: JobFunction) -> JobFunction:
+        if name in _registry:
+            msg = f"A job named {name!r} is already registered."
+            raise ValueError(msg)
+        _registry[name] = func
+        return func
+
+    return decorator
+
+
+def get_retry_delay(attempts: int) -> timedelta:
+    """Get the delay before retrying a job that failed the attempts.
+
+    The delay doubles with every attempt, with some jitter so jobs that
+    failed together are not all retried at once.
+    """
+    delay = min(RETRY_BASE_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+    return delay * random.uniform(1, 1.25)  # noqa: S311 not for security
+
+
+def renew_lease() -> None:
+    """Extend the lease of the running job, if any.
+
+    Meant to be called between the steps of a long job. The lease is only
+    written once half of it has passed, so frequent calls are cheap.
+    """
+    job = _current_job.get()
+    if job is None or job.run_at - timezone.now() > JOB_LEASE / 2:
+        return
+    job.run_at = timezone.now() + JOB_LEASE
+    Job.jobs.filter(pk=job.pk).update(run_at=job.run_at)
+
+
+def run_job(job: Job) -> bool:
+    """Run a claimed job, and delete it or schedule its retry.
+
+    Returns true if the job succeeded.
+    """
+    token = _current_job.set(job)
+    try:
+        func = _registry.get(job.name)
+        if func is None:
+            msg = f"Unknown job {job.name!r}."
+            raise LookupError(msg)
+        func(**job.kwargs)
+    except Exception:
+        logger.exception("Job %s (%s) failed", job.pk, job.name)
+        job.last_error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            job.failed = timezone.now()
+        else:
+            job.run_at = timezone.now() + get_retry_delay(job.attempts)
+        job.save(update_fields=["last_error", "failed", "run_at"])
+        return False
+    finally:
+        _current_job.reset(token)
+    job.delete()
+    return True
+
+
+def close_broken_connection() -> None:
+    """Drop a broken or expired connection, like at the start of a request.
+
+    The connection is kept if the caller runs jobs in its own transaction.
+    """
+    if not connection.in_atomic_block:
+        close_old_connections()
+
+
+def run_next_job() -> bool:
+    """Claim and run the next due job.
+
+    Returns false if no job is due.
+    """
+    close_broken_connection()
+    job = Job.jobs.claim(JOB_LEASE)
+    if job is None:
+        return False
+    run_job(job)
+    return True
@@ -0,0 +1,66 @@
+"""Backfill the feed activities of group items created before the feed."""
+
+from itertools import batched
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from lore.models import Achievement, Activity, Challenge, Image, Quote
+
+
+class Command(BaseCommand):
+    """Create the missing activity of every quote, image, etc."""
+
+    help = "Create feed activities for group items that do not have one."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add the batch size option."""
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of activities inserted per query.",
+        )
+
+    def handle(self, *_: Any, **options: Any) -> None:
+        """Insert an activity for each item that is missing one.
+
+        Items that gain an activity while the command runs are skipped,
+        so it is safe to run against a live database.
+        """
+        batch_size: int = options["batch_size"]
+        managers = [
+            Quote.quotes,
+            Image.images,
+            Achievement.achievements,
+            Challenge.challenges,
+        ]
+        for manager in managers:
+            type_name = manager.model._meta.model_name
+            items = (
+                manager.filter(activity__isnull=True)
+                .order_by("pk")
+                .values_list("pk", "group_id", "created")
+                .iterator(chunk_size=batch_size)
+            )
+            num_created = 0
+            for batch in batched(items, batch_size):
+                # items that gained an activity since they were read are
+                # skipped by the insert, so they are not counted
+                num_existing = Activity.activities.filter(
+                    **{f"{type_name}_id__in": [pk for pk, _, _ in batch]},
+                ).count()
+                Activity.activities.bulk_create(
+                    [
+                        Activity(
+                            group_id=group_id,
+                            type=type_name,
+                            created=created,
+                            **{f"{type_name}_id": pk},
+                        )
+                        for pk, group_id, created in batch
+                    ],
+                    ignore_conflicts=True,
+                )
+                num_created += len(batch) - num_existing
+            self.stdout.write(f"Created {num_created} {type_name} activities")
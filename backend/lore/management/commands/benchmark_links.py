@@ -0,0 +1,132 @@
+"""Time serializer hyperlinks built from url templates and with `reverse`."""
+
+import contextlib
+import timeit
+from collections.abc import Callable
+from typing import Any
+from unittest import mock
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+from django.urls import reverse
+from rest_framework.relations import HyperlinkedRelatedField
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from lore.links import TemplateHyperlinkedRelatedField, build_url
+from lore.models import LoreGroup, LoreUser, Quote
+from lore.serializers import QuoteSerializer
+
+
+class Rollback(Exception):  # noqa: N818 not an error
+    """Raised to roll back the benchmark's rows."""
+
+
+def reverse_url(request: Request, view_name: str, **kwargs: Any) -> str:
+    """Build an absolute url with `reverse`, like DRF's hyperlinks."""
+    return request.build_absolute_uri(reverse(view_name, kwargs=kwargs))
+
+
+def reversing() -> contextlib.ExitStack:
+    """Replace the url templates with DRF's reversed hyperlinks."""
+    stack = contextlib.ExitStack()
+    stack.enter_context(
+        mock.patch.object(
+            TemplateHyperlinkedRelatedField,
+            "get_url",
+            HyperlinkedRelatedField.get_url,
+        ),
+    )
+    stack.enter_context(mock.patch("lore.serializers.build_url", reverse_url))
+    return stack
+
+
+class Command(BaseCommand):
+    """Serialize quotes with both kinds of hyperlinks and time them.
+
+    The quotes are created in a transaction that is rolled back, so the
+    benchmark leaves the database unchanged.
+    """
+
+    help = "Time serializer hyperlinks with url templates and `reverse`."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add the row and repeat options."""
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=500,
+            help="The number of quotes serialized per run.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="The number of runs, of which the fastest is reported.",
+        )
+
+    def handle(self, *_: Any, **options: Any) -> None:
+        """Create the quotes, then time each kind of hyperlink."""
+        with contextlib.suppress(Rollback), transaction.atomic():
+            self.benchmark(options["rows"], options["repeat"])
+            raise Rollback
+
+    def benchmark(self, rows: int, repeat: int) -> None:
+        """Time serializing the quotes and building a single url."""
+        user = LoreUser.users.create_user(
+            "benchmark@example.com",
+            "Ada",
+            "Lovelace",
+            "password",
+        )
+        group = LoreGroup.groups.create_group(
+            name="Benchmark",
+            owner=user,
+            avatar=None,
+            members=[],
+            location="London",
+        )
+        Quote.quotes.bulk_create(
+            Quote(text=f"Quote {i}", said_by=user, group=group)
+            for i in range(rows)
+        )
+        quotes = list(
+            Quote.quotes.filter(group=group).select_related("said_by"),
+        )
+        request = Request(APIRequestFactory().get("/api/v1/quotes/"))
+        request.user = user
+
+        def serialize() -> None:
+            context = {"request": request}
+            _ = QuoteSerializer(quotes, many=True, context=context).data
+
+        def single_url() -> None:
+            build_url(request, "quote-detail", pk=quotes[0].pk)
+
+        def reverse_single_url() -> None:
+            reverse_url(request, "quote-detail", pk=quotes[0].pk)
+
+        self.report("templates", serialize, rows, repeat)
+        with reversing():
+            self.report("reverse", serialize, rows, repeat)
+        self.report("template single url", single_url, 1, repeat, 10_000)
+        self.report(
+            "reverse single url",
+            reverse_single_url,
+            1,
+            repeat,
+            10_000,
+        )
+
+    def report(
+        self,
+        label: str,
+        func: Callable[[], None],
+        rows: int,
+        repeat: int,
+        number: int = 1,
+    ) -> None:
+        """Write the fastest time per row of the function."""
+        best = min(timeit.repeat(func, repeat=repeat, number=number))
+        per_row = best / number / rows * 1_000_000
+        self.stdout.write(f"{label}: {per_row:.1f} us/row")
@@ -0,0 +1,197 @@
+"""Time list pages serialized by model serializers and by row serializers."""
+
+import contextlib
+import timeit
+from collections.abc import Callable
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import models, transaction
+from rest_framework.request import Request
+from rest_framework.serializers import ModelSerializer
+from rest_framework.test import APIRequestFactory
+
+from lore.models import Achievement, Image, LoreGroup, LoreUser, Quote
+from lore.rows import (
+    AchievementRowSerializer,
+    ImageRowSerializer,
+    QuoteRowSerializer,
+    RowSerializer,
+    UserRowSerializer,
+)
+
+
+class Rollback(Exception):  # noqa: N818 not an error
+    """Raised to roll back the benchmark's rows."""
+
+
+class Command(BaseCommand):
+    """Serialize items with both kinds of serializers and time them.
+
+    Each run reads the items from the database, like a list page does. The
+    items are created in a transaction that is rolled back, so the
+    benchmark leaves the database unchanged.
+    """
+
+    help = "Time list pages with model serializers and row serializers."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add the row and repeat options."""
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=500,
+            help="The number of items of each kind serialized per run.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="The number of runs, of which the fastest is reported.",
+        )
+
+    def handle(self, *_: Any, **options: Any) -> None:
+        """Create the items, then time each kind of serializer."""
+        with contextlib.suppress(Rollback), transaction.atomic():
+            self.benchmark(options["rows"], options["repeat"])
+            raise Rollback
+
+    def benchmark(self, rows: int, repeat: int) -> None:
+        """Time serializing every kind of item both ways."""
+        user = LoreUser.users.create_user(
+            "benchmark@example.com",
+            "Ada",
+            "Lovelace",
+            "password",
+        )
+        members = LoreUser.users.bulk_create(
+            LoreUser(
+                email=f"benchmark{i}@example.com",
+                first_name="Member",
+                last_name=str(i),
+                avatar=f"avatars/{i}.png",
+            )
+            for i in range(rows - 1)
+        )
+        group = LoreGroup.groups.create_group(
+            name="Benchmark",
+            owner=user,
+            avatar=None,
+            members=[],
+            location="London",
+        )
+        LoreGroup.members.through.objects.bulk_create(
+            LoreGroup.members.through(loregroup=group, loreuser=member)
+            for member in members
+        )
+        Quote.quotes.bulk_create(
+            Quote(text=f"Quote {i}", said_by=user, group=group)
+            for i in range(rows)
+        )
+        Image.images.bulk_create(
+            Image(image=f"group_images/{i}.png", group=group)
+            for i in range(rows)
+        )
+        achievements = Achievement.achievements.bulk_create(
+            Achievement(title=f"Achievement {i}", description="", group=group)
+            for i in range(rows)
+        )
+        Achievement.achieved_by.through.objects.bulk_create(
+            Achievement.achieved_by.through(
+                achievement=achievement,
+                loreuser=user,
+            )
+            for achievement in achievements[::2]
+        )
+        request = Request(APIRequestFactory().get("/api/v1/"))
+        request.user = user
+
+        user_achievements = Achievement.achievements.with_achieved_by_user(
+            user,
+        )
+        # the querysets load what the model serializers read, like the lists
+        kinds: list[tuple[str, models.QuerySet, type[RowSerializer]]] = [
+            (
+                "quotes",
+                Quote.quotes.filter(group=group).select_related("said_by"),
+                QuoteRowSerializer,
+            ),
+            ("images", Image.images.filter(group=group), ImageRowSerializer),
+            (
+                "users",
+                LoreUser.users.filter(member_of=group),
+                UserRowSerializer,
+            ),
+            (
+                "achievements",
+                user_achievements.filter(group=group).prefetch_related(
+                    "achieved_by",
+                ),
+                AchievementRowSerializer,
+            ),
+        ]
+        for label, queryset, row_serializer_class in kinds:
+            self.report(
+                f"{label} model",
+                self.model_serializing(
+                    request,
+                    queryset.order_by("pk"),
+                    row_serializer_class.serializer_class,
+                ),
+                rows,
+                repeat,
+            )
+            self.report(
+                f"{label} rows",
+                self.row_serializing(
+                    request,
+                    queryset.order_by("pk"),
+                    row_serializer_class,
+                ),
+                rows,
+                repeat,
+            )
+
+    def model_serializing(
+        self,
+        request: Request,
+        queryset: models.QuerySet,
+        serializer_class: type[ModelSerializer],
+    ) -> Callable[[], None]:
+        """Get a function that serializes the items as model instances."""
+
+        def serialize() -> None:
+            context = {"request": request}
+            serializer = serializer_class(
+                queryset.all(),
+                many=True,
+                context=context,
+            )
+            _ = serializer.data
+
+        return serialize
+
+    def row_serializing(
+        self,
+        request: Request,
+        queryset: models.QuerySet,
+        row_serializer_class: type[RowSerializer],
+    ) -> Callable[[], None]:
+        """Get a function that serializes the items as rows."""
+
+        def serialize() -> None:
+            row_serializer = row_serializer_class(request)
+            row_serializer.serialize(row_serializer.get_rows(queryset.all()))
+
+        return serialize
+
+    def report(
+        self,
+        label: str,
+        func: Callable[[], None],
+        rows: int,
+        repeat: int,
+    ) -> None:
+        """Write the rows per second of the fastest run of the function."""
+        best = min(timeit.repeat(func, repeat=repeat, number=1))
+        self.stdout.write(f"{label}: {rows / best:,.0f} rows/s")
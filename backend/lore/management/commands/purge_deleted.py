@@ -0,0 +1,31 @@
+"""Delete the soft deleted groups and users with everything they own."""
+
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from lore.deletion import PURGE_BATCH_SIZE, purge_deleted
+
+
+class Command(BaseCommand):
+    """Purge the groups and users that were soft deleted.
+
+    Their rows are deleted a batch at a time, each batch in a short
+    transaction, so it is safe to run against a live database.
+    """
+
+    help = "Delete soft deleted groups and users, with their items and files."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add the batch size option."""
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=PURGE_BATCH_SIZE,
+            help="The number of rows deleted per transaction.",
+        )
+
+    def handle(self, *_: Any, **options: Any) -> None:
+        """Purge every soft deleted group, then every soft deleted user."""
+        groups, users = purge_deleted(options["batch_size"])
+        self.stdout.write(f"Purged {groups} groups and {users} users")
@@ -0,0 +1,79 @@
+"""Fix stored counters that drifted from the rows they count."""
+
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import models, transaction
+
+from lore.models import (
+    Achievement,
+    Challenge,
+    ChallengeParticipant,
+    LoreGroup,
+    count_subquery,
+)
+
+
+class Command(BaseCommand):
+    """Recount the members, achievers and participants that drifted.
+
+    The counters are maintained by triggers, so they only drift if rows were
+    changed while the triggers were disabled, such as during a restore.
+    """
+
+    help = "Recount stored member, achiever and participant counters."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add the dry run option."""
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report the drifted counters without fixing them.",
+        )
+
+    def handle(self, *_: Any, **options: Any) -> None:
+        """Find the drifted counters, then recount each of them.
+
+        Each row is locked while it is recounted. Triggers of concurrent
+        writes wait for the lock, so their changes are counted exactly once
+        and it is safe to run against a live database.
+        """
+        dry_run: bool = options["dry_run"]
+        counters: list[tuple[models.Manager, str, models.Manager, str]] = [
+            (
+                LoreGroup.groups,
+                "member_count",
+                LoreGroup.members.through.objects,
+                "loregroup",
+            ),
+            (
+                Achievement.achievements,
+                "achiever_count",
+                Achievement.achieved_by.through.objects,
+                "achievement",
+            ),
+            (
+                Challenge.challenges,
+                "participant_count",
+                ChallengeParticipant.objects,
+                "challenge",
+            ),
+        ]
+        for manager, counter, relation, column in counters:
+            rows = relation.filter(**{column: models.OuterRef("pk")})
+            drifted = list(
+                manager.annotate(actual=count_subquery(rows, column))
+                .exclude(**{counter: models.F("actual")})
+                .values_list("pk", flat=True),
+            )
+            if not dry_run:
+                for pk in drifted:
+                    with transaction.atomic():
+                        manager.select_for_update().filter(pk=pk).first()
+                        actual = relation.filter(**{column: pk}).count()
+                        manager.filter(pk=pk).update(**{counter: actual})
+            model_name = manager.model._meta.model_name
+            action = "Found" if dry_run else "Fixed"
+            self.stdout.write(
+                f"{action} {len(drifted)} drifted {model_name} {counter}s",
+            )
@@ -0,0 +1,114 @@
+"""Run the background jobs queued in the database."""
+
+import logging
+import signal
+import threading
+from types import FrameType
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection
+
+from lore.jobs import close_broken_connection, run_next_job
+
+logger = logging.getLogger(__name__)
+
+# The longest a worker waits before retrying after repeated errors.
+MAX_ERROR_DELAY = 60.0
+
+
+def get_error_delay(errors: int) -> float:
+    """Get the seconds to wait after the consecutive errors.
+
+    The delay doubles with every error, so a worker does not spin while
+    the database is unavailable.
+    """
+    return min(2.0 ** (errors - 1), MAX_ERROR_DELAY)
+
+
+class Command(BaseCommand):
+    """Claim and run due jobs until stopped.
+
+    Each worker thread has its own database connection, and claims jobs
+    with `SKIP LOCKED`, so threads and processes share the queue without
+    running a job twice. Idle workers poll the queue. Workers that fail to
+    reach the database log the error and retry with a growing delay.
+    """
+
+    help = "Run queued background jobs."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add the concurrency, poll interval and burst options."""
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="The number of jobs run at the same time.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="The seconds an idle worker waits before polling again.",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once no job is due instead of polling.",
+        )
+
+    def handle(self, *_: Any, **options: Any) -> None:
+        """Run the workers until interrupted, or until the queue is empty.
+
+        The main thread is a worker too. On SIGINT or SIGTERM, the workers
+        finish their current job before exiting.
+        """
+        stopping = threading.Event()
+
+        def stop(_signum: int, _frame: FrameType | None) -> None:
+            stopping.set()
+
+        handlers = {
+            signum: signal.signal(signum, stop)
+            for signum in (signal.SIGINT, signal.SIGTERM)
+        }
+
+        def work(*, close_connection: bool) -> None:
+            errors = 0
+            try:
+                while not stopping.is_set():
+                    try:
+                        ran = run_next_job()
+                    except Exception:
+                        # such as the database restarting, which must not
+                        # stop the worker
+                        logger.exception("The worker failed to run a job")
+                        errors += 1
+                        close_broken_connection()
+                        stopping.wait(get_error_delay(errors))
+                        continue
+                    errors = 0
+                    if ran:
+                        continue
+                    if options["burst"]:
+                        return
+                    stopping.wait(options["poll_interval"])
+            finally:
+                if close_connection:
+                    connection.close()
+
+        threads = [
+            threading.Thread(target=work, kwargs={"close_connection": True})
+            for _ in range(max(options["concurrency"], 1) - 1)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            work(close_connection=False)
+        finally:
+            stopping.set()
+            for thread in threads:
+                thread.join()
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+        self.stdout.write("Stopped the workers")
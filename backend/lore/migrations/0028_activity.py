@@ -0,0 +1,34 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:13
+
+import django.db.models.deletion
+import django.db.models.manager
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lore', '0027_remove_achievement_image_achievement_difficulty'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Activity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('quote', 'Quote'), ('image', 'Image'), ('achievement', 'Achievement'), ('challenge', 'Challenge')], max_length=16)),
+                ('created', models.DateTimeField()),
+                ('achievement', models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='lore.achievement')),
+                ('challenge', models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='lore.challenge')),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='lore.loregroup')),
+                ('image', models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='lore.image')),
+                ('quote', models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='lore.quote')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['group', '-created'], name='lore_activity_group_created')],
+            },
+            managers=[
+                ('activities', django.db.models.manager.Manager()),
+            ],
+        ),
+    ]
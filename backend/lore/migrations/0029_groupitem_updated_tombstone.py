@@ -0,0 +1,83 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:17
+
+import django.db.models.deletion
+import django.db.models.manager
+from django.db import migrations, models
+
+
+def set_updated_to_created(apps, schema_editor):
+    """Treat existing items as last updated when they were created."""
+    for model_name in ["Quote", "Image", "Achievement", "Challenge"]:
+        model = apps.get_model("lore", model_name)
+        model._base_manager.update(updated=models.F("created"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lore', '0028_activity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('quote', 'Quote'), ('image', 'Image'), ('achievement', 'Achievement'), ('challenge', 'Challenge')], max_length=16)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('deleted', models.DateTimeField(auto_now_add=True)),
+            ],
+            managers=[
+                ('tombstones', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='achievement',
+            name='updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='challenge',
+            name='updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='quote',
+            name='updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(
+            set_updated_to_created,
+            migrations.RunPython.noop,
+        ),
+        migrations.AddIndex(
+            model_name='achievement',
+            index=models.Index(fields=['group', 'updated'], name='lore_achievement_group_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='challenge',
+            index=models.Index(fields=['group', 'updated'], name='lore_challenge_group_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(fields=['group', 'updated'], name='lore_image_group_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='quote',
+            index=models.Index(fields=['group', 'updated'], name='lore_quote_group_updated'),
+        ),
+        migrations.AddField(
+            model_name='tombstone',
+            name='group',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='lore.loregroup'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['group', 'deleted'], name='lore_tombstone_group_deleted'),
+        ),
+    ]
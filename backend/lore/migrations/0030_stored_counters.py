@@ -0,0 +1,98 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:36
+
+from django.db import migrations, models
+
+# Each counter column, the table that is counted and the column of that
+# table that references the counter's row.
+COUNTERS = [
+    ("lore_loregroup", "member_count", "lore_loregroup_members", "loregroup_id"),
+    ("lore_achievement", "achiever_count", "lore_achievement_achieved_by", "achievement_id"),
+    ("lore_challenge", "participant_count", "lore_challengeparticipant", "challenge_id"),
+]
+
+# Adds the number of inserted rows to, or subtracts the number of deleted
+# rows from, the counter of each referenced row. It runs once per statement,
+# so bulk inserts update each counter once.
+CREATE_FUNCTION = """
+CREATE FUNCTION lore_update_counter() RETURNS trigger AS $$
+DECLARE
+    changed_rows text := CASE TG_OP WHEN 'INSERT' THEN 'new_rows' ELSE 'old_rows' END;
+    sign integer := CASE TG_OP WHEN 'INSERT' THEN 1 ELSE -1 END;
+BEGIN
+    EXECUTE format(
+        'UPDATE %1$I SET %2$I = %1$I.%2$I + $1 * changed.count '
+        'FROM (SELECT %3$I AS id, count(*) AS count FROM %4$I GROUP BY %3$I) AS changed '
+        'WHERE %1$I.id = changed.id',
+        TG_ARGV[0], TG_ARGV[1], TG_ARGV[2], changed_rows
+    ) USING sign;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+CREATE_TRIGGERS = """
+CREATE TRIGGER {relation}_insert_count AFTER INSERT ON {relation}
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT
+    EXECUTE FUNCTION lore_update_counter('{table}', '{counter}', '{column}');
+CREATE TRIGGER {relation}_delete_count AFTER DELETE ON {relation}
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT
+    EXECUTE FUNCTION lore_update_counter('{table}', '{counter}', '{column}');
+"""
+
+DROP_TRIGGERS = """
+DROP TRIGGER {relation}_insert_count ON {relation};
+DROP TRIGGER {relation}_delete_count ON {relation};
+"""
+
+# The triggers are created first, so rows inserted by other transactions
+# wait for the migration to commit and are counted by the triggers.
+SET_COUNTER = """
+UPDATE {table} SET {counter} = (
+    SELECT count(*) FROM {relation} WHERE {relation}.{column} = {table}.id
+);
+"""
+
+
+def format_counters(sql):
+    """Format the SQL for every counter."""
+    return "".join(
+        sql.format(table=table, counter=counter, relation=relation, column=column)
+        for table, counter, relation, column in COUNTERS
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lore', '0029_groupitem_updated_tombstone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='achievement',
+            name='achiever_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='challenge',
+            name='participant_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='loregroup',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(
+            CREATE_FUNCTION,
+            "DROP FUNCTION lore_update_counter();",
+        ),
+        migrations.RunSQL(
+            format_counters(CREATE_TRIGGERS),
+            format_counters(DROP_TRIGGERS),
+        ),
+        migrations.RunSQL(
+            format_counters(SET_COUNTER),
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lore', '0030_stored_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='achievement',
+            index=models.Index(fields=['group', 'id'], name='lore_achievement_group_pk'),
+        ),
+        migrations.AddIndex(
+            model_name='challenge',
+            index=models.Index(fields=['group', 'id'], name='lore_challenge_group_pk'),
+        ),
+        migrations.AddIndex(
+            model_name='challenge',
+            index=models.Index(fields=['start_date', 'end_date'], name='lore_challenge_dates'),
+        ),
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(fields=['group', 'id'], name='lore_image_group_pk'),
+        ),
+        migrations.AddIndex(
+            model_name='quote',
+            index=models.Index(fields=['group', 'id'], name='lore_quote_group_pk'),
+        ),
+        migrations.AddIndex(
+            model_name='quote',
+            index=models.Index(condition=models.Q(('pinned', True)), fields=['group', 'id'], name='lore_quote_group_pinned'),
+        ),
+        migrations.AddIndex(
+            model_name='quote',
+            index=models.Index(fields=['said_by', 'id'], name='lore_quote_said_by_pk'),
+        ),
+        # the new indexes replace the foreign key indexes
+        migrations.AlterField(
+            model_name='achievement',
+            name='group',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='lore.loregroup'),
+        ),
+        migrations.AlterField(
+            model_name='challenge',
+            name='group',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='lore.loregroup'),
+        ),
+        migrations.AlterField(
+            model_name='image',
+            name='group',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='lore.loregroup'),
+        ),
+        migrations.AlterField(
+            model_name='quote',
+            name='group',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='lore.loregroup'),
+        ),
+        migrations.AlterField(
+            model_name='quote',
+            name='said_by',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
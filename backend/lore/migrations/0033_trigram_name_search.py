@@ -0,0 +1,29 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:45
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('lore', '0032_quote_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='loregroup',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='lore_loregroup_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='loreuser',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['first_name'], name='lore_loreuser_first_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='loreuser',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['last_name'], name='lore_loreuser_last_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
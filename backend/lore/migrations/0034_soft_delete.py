@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lore', '0033_trigram_name_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loregroup',
+            name='deleted',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='loreuser',
+            name='deleted',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+    ]
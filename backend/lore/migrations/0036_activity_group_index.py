@@ -0,0 +1,20 @@
+# Generated by Django 5.1.15 on 2026-10-18 18:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lore', '0035_job_queue'),
+    ]
+
+    operations = [
+        # lore_activity_group_created replaces the foreign key index
+        migrations.AlterField(
+            model_name='activity',
+            name='group',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='lore.loregroup'),
+        ),
+    ]
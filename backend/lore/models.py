@@ -1,18 +1,29 @@
 import pathlib
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import ClassVar, Optional, cast
 
 from django.contrib.auth.models import AbstractUser, BaseUserManager
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.core.exceptions import PermissionDenied
 from django.core.files import File
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models.functions import Coalesce
 from django.forms import ValidationError
 from django.http import Http404
+from django.utils import timezone
 from django.utils.deconstruct import deconstructible
 from rest_framework.fields import MinLengthValidator, ObjectDoesNotExist
 from django.core.validators import MaxValueValidator, MinValueValidator
 
+from lore.cache import (
+    bump_group_version,
+    forget_user_group_ids,
+    get_user_group_ids,
+)
+from lore.search import SEARCH_CONFIG
+
 
 class Http409Error(Exception):
     """HTTP conflict exception."""
@@ -41,6 +52,49 @@ class PathAndRename:
         return pathlib.Path(self.path) / filename
 
 
+class StoredCountersMixin:
+    """Keep saves from overwriting counters maintained by the database.
+
+    Counter columns are updated by triggers whenever rows of the relation
+    they count are inserted or deleted, so the copy loaded on an instance
+    may be stale. Saving an existing instance only writes its other fields.
+    """
+
+    counter_fields: ClassVar[tuple[str, ...]] = ()
+
+    def save(self, *args, **kwargs) -> None:
+        """Save the instance without writing its counters."""
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+    def refresh_counters(self) -> None:
+        """Reload the counters after their relations changed."""
+        self.refresh_from_db(fields=self.counter_fields)
+
+
+def count_subquery(queryset: models.QuerySet, column: str) -> Coalesce:
+    """Count the rows of a queryset correlated to the outer query.
+
+    The queryset should filter `column` on an OuterRef. Unlike Count, the
+    subquery is not affected by joins and filters of the outer query.
+    """
+    return Coalesce(
+        models.Subquery(
+            queryset.order_by()
+            .values(column)
+            .annotate(count=models.Count("pk"))
+            .values("count"),
+        ),
+        0,
+    )
+
+
 class LoreUserManager(BaseUserManager["LoreUser"]):
     """Manages the Lore User."""
 
@@ -105,24 +159,78 @@ class LoreUser(AbstractUser):
         upload_to=PathAndRename("avatars"),
         null=True,
     )
+    # set when the user deleted their account, until it is purged
+    deleted = models.DateTimeField(null=True, editable=False)
 
     REQUIRED_FIELDS: ClassVar[list[str]] = ["first_name", "last_name"]
     USERNAME_FIELD = "email"
     users = LoreUserManager()
 
-    def is_in_group(self, group_pk: int) -> bool:
-        """Return true if the user is in the group with the given pk."""
-        return LoreGroup.groups.filter(members=self, pk=group_pk).exists()
+    class Meta(AbstractUser.Meta):
+        """Configuration for this model."""
+
+        indexes: ClassVar[list[models.Index]] = [
+            # searched by trigram similarity
+            GinIndex(
+                fields=["first_name"],
+                opclasses=["gin_trgm_ops"],
+                name="lore_loreuser_first_name_trgm",
+            ),
+            GinIndex(
+                fields=["last_name"],
+                opclasses=["gin_trgm_ops"],
+                name="lore_loreuser_last_name_trgm",
+            ),
+        ]
+
+    def soft_delete(self) -> None:
+        """Deactivate the account now, and leave deleting it for later.
+
+        The user can no longer log in and leaves their groups. Their quotes
+        and files are deleted by the `purge_user` job.
+        """
+        with transaction.atomic():
+            self.deleted = timezone.now()
+            self.is_active = False
+            self.save(update_fields=["deleted", "is_active"])
+            self.member_of.clear()
+            Job.jobs.enqueue(
+                "purge_user",
+                priority=Job.Priority.LOW,
+                user_id=self.pk,
+            )
+
+    def is_in_group(self, group_pk: int | str) -> bool:
+        """Return true if the user is in the group with the given pk.
+
+        Reads the user's group ids, which are loaded once per request.
+        """
+        try:
+            return int(group_pk) in get_user_group_ids(self)
+        except (TypeError, ValueError):
+            return False
+
+    def shares_group_with(self, user_pk: int) -> bool:
+        """Return true if the users are members of a common group.
+
+        Runs a single EXISTS over the membership table.
+        """
+        memberships = LoreGroup.members.through.objects
+        return memberships.filter(
+            loreuser=user_pk,
+            loregroup__in=memberships.filter(loreuser=self).values("loregroup"),
+        ).exists()
 
     def get_mutual_users(self) -> models.QuerySet["LoreUser", "LoreUser"]:
         """Retrieve users that share groups with this user.
 
         The query will return this user as well
+        The user's groups are selected in a subquery, so evaluating the
+        queryset takes a single query.
         """
-        groups = LoreGroup.groups.get_groups_with_user(self)
-        group_ids = [group.pk for group in groups]
+        groups = LoreGroup.groups.get_groups_with_user(self).values("pk")
         return (
-            LoreUser.users.filter(member_of__in=group_ids)
+            LoreUser.users.filter(member_of__in=groups)
             .order_by("pk")
             .distinct("pk")
         )
@@ -176,6 +284,10 @@ class LoreGroupManager(models.Manager):
         group.save(using=self._db)
         group.members.add(owner.pk)
         group.members.add(*[m.pk for m in members])
+        group.refresh_counters()
+        bump_group_version(group.pk)
+        for user in [owner, *members]:
+            forget_user_group_ids(user)
 
         return group
 
@@ -186,18 +298,24 @@ class LoreGroupManager(models.Manager):
         If the user is already in the group, will raise a 409 error
         """
         try:
-            group: LoreGroup = self.get(join_code=join_code)
+            group: LoreGroup = self.get(
+                join_code=join_code,
+                deleted__isnull=True,
+            )
             if group.has_member(user):
                 msg = "Already in group"
                 raise Http409Error(msg)
             group.members.add(user.pk)
+            group.refresh_counters()
+            bump_group_version(group.pk)
+            forget_user_group_ids(user)
         except ObjectDoesNotExist as e:
             raise Http404 from e
         else:
             return group
 
 
-class LoreGroup(models.Model):
+class LoreGroup(StoredCountersMixin, models.Model):
     """The model representing a lore group."""
 
     name = models.CharField(
@@ -216,37 +334,78 @@ class LoreGroup(models.Model):
         null=True,
     )
     location = models.CharField(max_length=32)
+    # set when the group was deleted, until it is purged
+    deleted = models.DateTimeField(null=True, editable=False)
+    # maintained by a trigger on the members table
+    member_count = models.PositiveIntegerField(default=0, editable=False)
 
     REQUIRED_FIELDS: ClassVar[list[str]] = ["name", "members", "avatar"]
+    counter_fields: ClassVar[tuple[str, ...]] = ("member_count",)
 
     groups = LoreGroupManager()
 
+    class Meta:
+        """Configuration for this model."""
+
+        indexes: ClassVar[list[models.Index]] = [
+            # searched by trigram similarity
+            GinIndex(
+                fields=["name"],
+                opclasses=["gin_trgm_ops"],
+                name="lore_loregroup_name_trgm",
+            ),
+        ]
+
     def __str__(self) -> str:
         """Output a string with the name and join code."""
         return f"{self.name} {self.join_code}"
 
+    def save(self, *args, **kwargs) -> None:
+        """Save the group and bump its version."""
+        super().save(*args, **kwargs)
+        bump_group_version(self.pk)
+
+    def soft_delete(self) -> None:
+        """Hide the group now, and leave deleting its items for later.
+
+        The group loses its members, which revokes their access right away.
+        Its items and files are deleted by the `purge_group` job.
+        """
+        with transaction.atomic():
+            self.deleted = timezone.now()
+            self.save(update_fields=["deleted"])
+            self.members.clear()
+            Job.jobs.enqueue(
+                "purge_group",
+                priority=Job.Priority.LOW,
+                group_id=self.pk,
+            )
+
     def get_quotes(self) -> list["Quote"]:
         """Get all the quotes related to this group."""
         return Quote.quotes.get_group_quotes(self)
 
     def has_member(self, user: LoreUser) -> bool:
         """Return true if the user is a member of the group."""
-        return self.members.filter(id=user.pk).exists()
+        return user.is_in_group(self.pk)
 
     @property
     def num_members(self) -> int:
         """Get the number of members in the group."""
-        return self.members.count()
+        return self.member_count
 
     def leave_group(self, user: "LoreUser") -> None:
         """Attempt to remove the user from the group.
 
         Will 404 if the user is not in the group
         """
-        if not self.members.contains(user):
+        if not self.has_member(user):
             msg = "User not in group"
             raise Http404(msg)
         self.members.remove(user.pk)
+        self.refresh_counters()
+        bump_group_version(self.pk)
+        forget_user_group_ids(user)
 
         # TODO: handle last user leaving
 
@@ -254,11 +413,15 @@ class LoreGroup(models.Model):
 class QuoteManager(models.Manager):
     """The Manager for quotes."""
 
+    def get_queryset(self) -> models.QuerySet["Quote", "Quote"]:
+        """Get the quotes, without loading their search vectors."""
+        return super().get_queryset().defer("search_vector")
+
     def create_quote(
         self,
         text: str,
         context: str | None,
-        said_by_pk: int,
+        said_by: LoreUser,
         is_pinned: bool,
         group: LoreGroup,
     ) -> "Quote":
@@ -269,15 +432,10 @@ class QuoteManager(models.Manager):
         if not text:
             msg = "Must have text"
             raise ValueError(msg)
-        if not said_by_pk:
+        if said_by is None:
             msg = "Must have a user that said the quote"
             raise ValueError(msg)
 
-        said_by: LoreUser | None = LoreUser.users.filter(pk=said_by_pk).first()
-        if said_by is None:
-            msg = "Said by user does not exist"
-            raise Http404(msg)
-
         if context is None:
             context = ""
 
@@ -289,9 +447,27 @@ class QuoteManager(models.Manager):
             group_id=group.pk,
         )
 
-        quote.save(using=self._db)
+        with transaction.atomic(using=self._db):
+            quote.save(using=self._db)
+            Activity.activities.record(quote)
         return quote
 
+    def bulk_create_quotes(
+        self,
+        quotes: list["Quote"],
+        group_id: int,
+    ) -> list["Quote"]:
+        """Create quotes of the group, and their activities, in bulk.
+
+        The quotes are not validated, and their speakers are expected to be
+        members of the group.
+        """
+        with transaction.atomic(using=self._db):
+            quotes = self.bulk_create(quotes)
+            Activity.activities.record_many(quotes)
+        bump_group_version(group_id)
+        return quotes
+
     def get_group_quotes(self, group: LoreGroup) -> list["Quote"]:
         """Get all quotes in the given group."""
         return cast(list["Quote"], self.filter(group_id=group.pk))
@@ -301,14 +477,52 @@ class QuoteManager(models.Manager):
 
 
 class GroupItem(models.Model):
-    """Represents an item that belongs to a LoreGroup."""
+    """Represents an item that belongs to a LoreGroup.
 
-    group = models.ForeignKey(LoreGroup, on_delete=models.CASCADE)
+    Saving or deleting an item invalidates the cached responses of its group.
+    The updated timestamp lets clients sync the items changed since their
+    last sync.
+    """
+
+    # indexed by the group and primary key index
+    group = models.ForeignKey(
+        LoreGroup,
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    updated = models.DateTimeField(auto_now=True)
 
     class Meta:
         """Configuration for this model."""
 
         abstract = True
+        indexes: ClassVar[list[models.Index]] = [
+            models.Index(
+                fields=["group", "updated"],
+                name="%(app_label)s_%(class)s_group_updated",
+            ),
+            # lists filter by group and page in primary key order
+            models.Index(
+                fields=["group", "id"],
+                name="%(app_label)s_%(class)s_group_pk",
+            ),
+        ]
+
+    def save(self, *args, **kwargs) -> None:
+        """Save the item and bump its group's version."""
+        super().save(*args, **kwargs)
+        bump_group_version(self.group_id)
+
+    def touch(self) -> None:
+        """Mark the item as updated after one of its relations changed."""
+        self.save(update_fields=["updated"])
+
+    def delete(self, *args, **kwargs) -> tuple[int, dict[str, int]]:
+        """Delete the item and bump its group's version."""
+        group_id = self.group_id
+        deleted = super().delete(*args, **kwargs)
+        bump_group_version(group_id)
+        return deleted
 
 
 class Quote(GroupItem):
@@ -327,15 +541,45 @@ class Quote(GroupItem):
         validators=[MinLengthValidator(1)],
         default="",
     )
-    said_by = models.ForeignKey(LoreUser, on_delete=models.CASCADE)
+    # indexed by lore_quote_said_by_pk
+    said_by = models.ForeignKey(
+        LoreUser,
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
     pinned = models.BooleanField(default=False)
     created = models.DateTimeField(auto_now_add=True)
+    # computed by the database whenever the text or context change
+    search_vector = models.GeneratedField(
+        expression=SearchVector("text", weight="A", config=SEARCH_CONFIG)
+        + SearchVector("context", weight="B", config=SEARCH_CONFIG),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
 
     REQUIRED_FIELDS: ClassVar[list[str]] = ["text"]
 
     quotes = QuoteManager()
     # objects = models.Manager()
 
+    class Meta(GroupItem.Meta):
+        """Configuration for this model."""
+
+        indexes: ClassVar[list[models.Index]] = [
+            *GroupItem.Meta.indexes,
+            # only the few pinned quotes of each group are indexed
+            models.Index(
+                fields=["group", "id"],
+                condition=models.Q(pinned=True),
+                name="lore_quote_group_pinned",
+            ),
+            models.Index(
+                fields=["said_by", "id"],
+                name="lore_quote_said_by_pk",
+            ),
+            GinIndex(fields=["search_vector"], name="lore_quote_search"),
+        ]
+
     def clean(self) -> None:
         """Validate that said_by is in the same group as the quote."""
         if not self.group.has_member(self.said_by):
@@ -370,7 +614,9 @@ class ImageManager(models.Manager):
             group_id=group.pk,
         )
 
-        image_model.save(using=self._db)
+        with transaction.atomic(using=self._db):
+            image_model.save(using=self._db)
+            Activity.activities.record(image_model)
         return image_model
 
     def get_group_images(self, group: LoreGroup) -> list["Image"]:
@@ -388,7 +634,6 @@ class Image(GroupItem):
 
     image = models.ImageField(upload_to=PathAndRename("group_images"))
     description = models.CharField(max_length=128, default="")
-    group = models.ForeignKey(LoreGroup, on_delete=models.CASCADE)
     created = models.DateTimeField(auto_now_add=True)
 
     REQUIRED_FIELDS: ClassVar[list[str]] = ["image"]
@@ -418,8 +663,11 @@ class AchievementManager(models.Manager):
             group=group,
         )
 
-        achievement_model.save(using=self._db)
-        achievement_model.achieved_by.set(achieved_by)
+        with transaction.atomic(using=self._db):
+            achievement_model.save(using=self._db)
+            achievement_model.achieved_by.set(achieved_by)
+            achievement_model.refresh_counters()
+            Activity.activities.record(achievement_model)
         return achievement_model
 
     def get_group_achievements(
@@ -429,8 +677,23 @@ class AchievementManager(models.Manager):
         """Retrieve all achievements in the given group."""
         return self.filter(group=group)
 
+    def with_achieved_by_user(
+        self,
+        user: LoreUser,
+    ) -> models.QuerySet["Achievement", "Achievement"]:
+        """Annotate whether the user is an achiever as `achieved_by_user`.
+
+        It is computed in a subquery, so it is not affected by later filters
+        on achievers.
+        """
+        achievers = Achievement.achieved_by.through.objects.filter(
+            achievement=models.OuterRef("pk"),
+            loreuser=user,
+        )
+        return self.annotate(achieved_by_user=models.Exists(achievers))
+
 
-class Achievement(GroupItem):
+class Achievement(StoredCountersMixin, GroupItem):
     """Represents a groups achievements.
 
     Requires a title with max length 128,
@@ -439,17 +702,29 @@ class Achievement(GroupItem):
     and a group foreign key
     """
 
+    class Result(models.TextChoices):
+        """What awarding or revoking the achievement did for a user."""
+
+        AWARDED = "awarded"
+        REVOKED = "revoked"
+        ALREADY_ACHIEVED = "already_achieved"
+        NOT_ACHIEVED = "not_achieved"
+        NOT_MEMBER = "not_member"
+
     title = models.CharField(max_length=128)
     description = models.CharField(max_length=1024)
     difficulty = models.IntegerField(default=1, validators=[MinValueValidator(1), MaxValueValidator(3)])
-    group = models.ForeignKey(LoreGroup, on_delete=models.CASCADE)
     achieved_by = models.ManyToManyField(LoreUser)
     created = models.DateTimeField(auto_now_add=True)
+    # maintained by a trigger on the achieved by table
+    achiever_count = models.PositiveIntegerField(default=0, editable=False)
+
+    counter_fields: ClassVar[tuple[str, ...]] = ("achiever_count",)
 
     @property
     def num_achieved(self) -> int:
         """Get the number of users that achieved this."""
-        return self.achieved_by.count()
+        return self.achiever_count
 
     REQUIRED_FIELDS: ClassVar[list[str]] = [
         "difficulty",
@@ -471,6 +746,8 @@ class Achievement(GroupItem):
         if self.has_achiever(user):
             return False
         self.achieved_by.add(user)
+        self.refresh_counters()
+        self.touch()
 
         return True
 
@@ -486,6 +763,8 @@ class Achievement(GroupItem):
         if not self.has_achiever(user):
             return False
         self.achieved_by.remove(user)
+        self.refresh_counters()
+        self.touch()
         return True
 
     def has_achiever(self, user: LoreUser) -> bool:
@@ -495,6 +774,82 @@ class Achievement(GroupItem):
         """
         return self.achieved_by.contains(user)
 
+    def get_achieved_members(self, user_ids: list[int]) -> dict[int, bool]:
+        """Check which of the users are members, and if they achieved this.
+
+        Returns whether each member achieved this, keyed by their id. Users
+        that are not members of the group are left out.
+        """
+        achievers = Achievement.achieved_by.through.objects.filter(
+            achievement=self.pk,
+            loreuser=models.OuterRef("loreuser"),
+        )
+        members = LoreGroup.members.through.objects.filter(
+            loregroup=self.group_id,
+            loreuser__in=user_ids,
+        )
+        return dict(
+            members.annotate(achieved=models.Exists(achievers)).values_list(
+                "loreuser",
+                "achieved",
+            ),
+        )
+
+    def add_achievers(self, user_ids: list[int]) -> dict[int, Result]:
+        """Add the users that are members of the group to the achievers.
+
+        Checks the users with one query and adds them with one insert,
+        which skips users that achieved this in the meantime. Returns the
+        `Result` for each user.
+        """
+        results = dict.fromkeys(user_ids, self.Result.NOT_MEMBER)
+        awarded = []
+        for pk, has_achieved in self.get_achieved_members(user_ids).items():
+            if has_achieved:
+                results[pk] = self.Result.ALREADY_ACHIEVED
+            else:
+                results[pk] = self.Result.AWARDED
+                awarded.append(pk)
+
+        if awarded:
+            through = Achievement.achieved_by.through
+            with transaction.atomic():
+                through.objects.bulk_create(
+                    [
+                        through(achievement_id=self.pk, loreuser_id=pk)
+                        for pk in awarded
+                    ],
+                    ignore_conflicts=True,
+                )
+                self.refresh_counters()
+                self.touch()
+        return results
+
+    def remove_achievers(self, user_ids: list[int]) -> dict[int, Result]:
+        """Remove the users that are members of the group from the achievers.
+
+        Checks the users with one query and removes them with one delete.
+        Returns the `Result` for each user.
+        """
+        results = dict.fromkeys(user_ids, self.Result.NOT_MEMBER)
+        revoked = []
+        for pk, has_achieved in self.get_achieved_members(user_ids).items():
+            if has_achieved:
+                results[pk] = self.Result.REVOKED
+                revoked.append(pk)
+            else:
+                results[pk] = self.Result.NOT_ACHIEVED
+
+        if revoked:
+            with transaction.atomic():
+                Achievement.achieved_by.through.objects.filter(
+                    achievement=self.pk,
+                    loreuser__in=revoked,
+                ).delete()
+                self.refresh_counters()
+                self.touch()
+        return results
+
 
 class ChallengeManager(models.Manager):
     """Manager for handling achievement model functionalities."""
@@ -524,8 +879,11 @@ class ChallengeManager(models.Manager):
             group=group,
         )
 
-        challenge_model.save(using=self._db)
-        challenge_model.participants.set(participants)
+        with transaction.atomic(using=self._db):
+            challenge_model.save(using=self._db)
+            challenge_model.participants.set(participants)
+            challenge_model.refresh_counters()
+            Activity.activities.record(challenge_model)
         return challenge_model
 
     def get_group_challenges(
@@ -536,7 +894,7 @@ class ChallengeManager(models.Manager):
         return self.filter(group=group)
 
 
-class Challenge(GroupItem):
+class Challenge(StoredCountersMixin, GroupItem):
     """Represents a groups achievements.
 
     Requires a title with max length 128,
@@ -545,9 +903,15 @@ class Challenge(GroupItem):
     and a group foreign key
     """
 
+    class Result(models.TextChoices):
+        """What completing the challenge did for a user."""
+
+        COMPLETED = "completed"
+        ALREADY_COMPLETED = "already_completed"
+        NOT_PARTICIPANT = "not_participant"
+
     title = models.CharField(max_length=128)
     description = models.CharField(max_length=1024)
-    group = models.ForeignKey(LoreGroup, on_delete=models.CASCADE)
     participants = models.ManyToManyField(
         LoreUser,
         through="ChallengeParticipant",
@@ -558,11 +922,29 @@ class Challenge(GroupItem):
     start_date = models.DateField()
     end_date = models.DateField()
     created = models.DateTimeField(auto_now_add=True)
+    # maintained by a trigger on the participants table
+    participant_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+    )
+
+    counter_fields: ClassVar[tuple[str, ...]] = ("participant_count",)
+
+    class Meta(GroupItem.Meta):
+        """Configuration for this model."""
+
+        indexes: ClassVar[list[models.Index]] = [
+            *GroupItem.Meta.indexes,
+            models.Index(
+                fields=["start_date", "end_date"],
+                name="lore_challenge_dates",
+            ),
+        ]
 
     @property
     def num_participants(self) -> int:
         """Get the number of users that achieved this."""
-        return self.participants.count()
+        return self.participant_count
 
     REQUIRED_FIELDS: ClassVar[list[str]] = [
         "title",
@@ -590,6 +972,8 @@ class Challenge(GroupItem):
         if self.has_participant(user):
             return None
         self.participants.add(user)
+        self.refresh_counters()
+        self.touch()
 
         return ChallengeParticipant.objects.get(challenge=self, lore_user=user)
 
@@ -599,19 +983,54 @@ class Challenge(GroupItem):
         Throws a Http404 if the relation doesn't exist,
         or an AlreadyCompltedChallengeError
         """
-        relation = Challenge.challenges.get(
-            loreuser_pk=user.pk,
-            challenge_pk=self.pk,
-        )
-
-        if relation is None:
+        results = self.complete_for_users([user.pk])
+        if results[user.pk] == self.Result.NOT_PARTICIPANT:
             raise Http404
-
-        if relation.completed_challenge:
+        if results[user.pk] == self.Result.ALREADY_COMPLETED:
             raise AlreadyCompltedChallengeError
 
-        relation.update(completed=True)
-        relation.save()
+    def complete_for_users(self, user_ids: list[int]) -> dict[int, Result]:
+        """Mark the participants among the users as having completed this.
+
+        Marks them in a single update, which returns the participants it
+        changed, so concurrent completions of the same participant only
+        succeed once. The participants that completed the challenge are
+        then granted its achievement with a single insert. Returns the
+        `Result` for each user.
+        """
+        meta = ChallengeParticipant._meta
+        table = connection.ops.quote_name(meta.db_table)
+        challenge, user, done = (
+            connection.ops.quote_name(meta.get_field(name).column)
+            for name in ("challenge", "lore_user", "completed_challenge")
+        )
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE {table} SET {done} = true
+                WHERE {challenge} = %s
+                    AND {user} = ANY(%s)
+                    AND NOT {done}
+                RETURNING {user}
+                """,  # noqa: S608 the names are not user input
+                [self.pk, user_ids],
+            )
+            completed = [pk for (pk,) in cursor.fetchall()]
+            if completed:
+                self.achievement.add_achievers(completed)
+                # lets syncing clients see the completions
+                self.touch()
+
+        results = dict.fromkeys(user_ids, self.Result.NOT_PARTICIPANT)
+        already_completed = ChallengeParticipant.objects.filter(
+            challenge=self,
+            lore_user__in=set(user_ids).difference(completed),
+        ).values_list("lore_user", flat=True)
+        for pk in already_completed:
+            results[pk] = self.Result.ALREADY_COMPLETED
+        for pk in completed:
+            results[pk] = self.Result.COMPLETED
+        return results
 
     def has_participant(self, user: LoreUser) -> bool:
         """Check if the user already achieved this.
@@ -630,3 +1049,241 @@ class ChallengeParticipant(models.Model):
     )
     challenge = models.ForeignKey(Challenge, on_delete=models.CASCADE)
     completed_challenge = models.BooleanField(default=False)
+
+
+class ActivityManager(models.Manager):
+    """Manager for the events shown in the feed."""
+
+    def record(self, item: GroupItem) -> "Activity":
+        """Add a newly created group item to its group's feed."""
+        activity = self.model(
+            group_id=item.group_id,
+            type=item._meta.model_name,
+            created=item.created,
+            **{item._meta.model_name: item},
+        )
+        activity.save(using=self._db)
+        return activity
+
+    def record_many(self, items: list[GroupItem]) -> list["Activity"]:
+        """Add newly created group items to their groups' feeds."""
+        return self.bulk_create(
+            self.model(
+                group_id=item.group_id,
+                type=item._meta.model_name,
+                created=item.created,
+                **{item._meta.model_name: item},
+            )
+            for item in items
+        )
+
+    def get_group_activities(
+        self,
+        group_ids: list[int],
+    ) -> models.QuerySet["Activity", "Activity"]:
+        """Retrieve the activities in the groups with the given ids.
+
+        Each activity is annotated with the `object_id` of its item.
+        """
+        return self.filter(group_id__in=group_ids).annotate(
+            object_id=Coalesce(
+                *[f"{type_name}_id" for type_name in Activity.Type.values],
+            ),
+        )
+
+
+class Activity(models.Model):
+    """An event in a group's feed.
+
+    Activities are written when a group item is created, so the feed can
+    be read from a single table. Exactly one of the item foreign keys is
+    set, matching the activity's type, and deleting the item deletes the
+    activity with it.
+    """
+
+    class Type(models.TextChoices):
+        """The kinds of group items shown in the feed."""
+
+        QUOTE = "quote"
+        IMAGE = "image"
+        ACHIEVEMENT = "achievement"
+        CHALLENGE = "challenge"
+
+    # indexed by lore_activity_group_created
+    group = models.ForeignKey(
+        LoreGroup,
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    type = models.CharField(max_length=16, choices=Type.choices)
+    created = models.DateTimeField()
+    quote = models.OneToOneField(
+        Quote,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name="activity",
+    )
+    image = models.OneToOneField(
+        Image,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name="activity",
+    )
+    achievement = models.OneToOneField(
+        Achievement,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name="activity",
+    )
+    challenge = models.OneToOneField(
+        Challenge,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name="activity",
+    )
+
+    activities = ActivityManager()
+
+    class Meta:
+        """Configuration for this model."""
+
+        indexes: ClassVar[list[models.Index]] = [
+            models.Index(
+                fields=["group", "-created"],
+                name="lore_activity_group_created",
+            ),
+        ]
+
+
+class TombstoneManager(models.Manager):
+    """Manager for the records of deleted group items."""
+
+    def record(self, item: GroupItem) -> "Tombstone":
+        """Record the deletion of the group item."""
+        tombstone = self.model(
+            group_id=item.group_id,
+            type=item._meta.model_name,
+            object_id=item.pk,
+        )
+        tombstone.save(using=self._db)
+        return tombstone
+
+
+class Tombstone(models.Model):
+    """Records a deleted group item so clients can sync the deletion."""
+
+    group = models.ForeignKey(LoreGroup, on_delete=models.CASCADE)
+    type = models.CharField(max_length=16, choices=Activity.Type.choices)
+    object_id = models.PositiveBigIntegerField()
+    deleted = models.DateTimeField(auto_now_add=True)
+
+    tombstones = TombstoneManager()
+
+    class Meta:
+        """Configuration for this model."""
+
+        indexes: ClassVar[list[models.Index]] = [
+            models.Index(
+                fields=["group", "deleted"],
+                name="lore_tombstone_group_deleted",
+            ),
+        ]
+
+
+class JobManager(models.Manager):
+    """Manager for the queue of background jobs."""
+
+    def enqueue(
+        self,
+        name: str,
+        *,
+        priority: int = 0,
+        run_at: datetime | None = None,
+        max_attempts: int = 5,
+        **kwargs: object,
+    ) -> "Job":
+        """Queue a run of the named job with the keyword arguments.
+
+        The job is written with the default connection, so enqueueing it in
+        the transaction of the write that triggers it only runs it if that
+        write is committed. The arguments must be JSON serializable.
+        """
+        job = self.model(
+            name=name,
+            kwargs=kwargs,
+            priority=priority,
+            run_at=run_at or timezone.now(),
+            max_attempts=max_attempts,
+        )
+        job.save(using=self._db)
+        return job
+
+    def claim(self, lease: timedelta) -> Optional["Job"]:
+        """Claim the next job that is due, or return None.
+
+        Concurrent workers skip the jobs locked by each other instead of
+        waiting for them. The job is leased rather than kept locked while it
+        runs, so it is retried if the worker dies before finishing it. Jobs
+        whose workers died on every attempt are marked as failed.
+        """
+        now = timezone.now()
+        pending = (
+            self.select_for_update(skip_locked=True)
+            .filter(failed__isnull=True, run_at__lte=now)
+            .order_by("-priority", "run_at", "pk")
+        )
+        with transaction.atomic(using=self._db):
+            while True:
+                job = pending.first()
+                if job is None:
+                    return None
+                if job.attempts < job.max_attempts:
+                    break
+                job.failed = now
+                job.last_error = "The lease of the last attempt expired."
+                job.save(update_fields=["failed", "last_error"])
+            job.attempts += 1
+            job.run_at = now + lease
+            job.save(update_fields=["attempts", "run_at"])
+        return job
+
+
+class Job(models.Model):
+    """A background job, run by the `run_lore_worker` command.
+
+    Jobs are deleted once they succeed. Failed jobs are retried with an
+    exponential backoff, and kept with their error once they ran out of
+    attempts.
+    """
+
+    class Priority(models.IntegerChoices):
+        """Common priorities, jobs with a higher priority run first."""
+
+        LOW = -10
+        NORMAL = 0
+        HIGH = 10
+
+    name = models.CharField(max_length=64)
+    kwargs = models.JSONField(default=dict)
+    priority = models.SmallIntegerField(default=Priority.NORMAL)
+    # when the job is due, or when the lease of a running job expires
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    last_error = models.TextField(blank=True)
+    failed = models.DateTimeField(null=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    jobs = JobManager()
+
+    class Meta:
+        """Configuration for this model."""
+
+        indexes: ClassVar[list[models.Index]] = [
+            # workers claim the pending job with the highest priority
+            models.Index(
+                fields=["-priority", "run_at"],
+                name="lore_job_pending",
+                condition=models.Q(failed__isnull=True),
+            ),
+        ]
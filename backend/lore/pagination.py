@@ -0,0 +1,83 @@
+"""Pagination helpers shared by the lore views."""
+
+import base64
+import binascii
+from datetime import datetime
+from typing import NamedTuple
+
+from rest_framework.exceptions import ParseError
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework.views import Request
+
+
+class FeedCursor(NamedTuple):
+    """A position in the feed.
+
+    Items are ordered by descending (created, type, id), so a cursor
+    points at the last item of a page and the next page starts strictly
+    after it.
+    """
+
+    created: datetime
+    type: str
+    id: int
+
+    def encode(self) -> str:
+        """Encode the cursor as an opaque url safe string."""
+        raw = f"{self.created.isoformat()}|{self.type}|{self.id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @classmethod
+    def decode(cls, encoded: str) -> "FeedCursor":
+        """Decode a cursor created by `encode`.
+
+        Raises a ParseError if the cursor is malformed
+        """
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode()).decode()
+            created, type_name, pk = raw.split("|")
+            cursor = cls(datetime.fromisoformat(created), type_name, int(pk))
+        except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+            msg = "Invalid cursor."
+            raise ParseError(msg) from e
+        # timestamps are aware and types are names, anything else was
+        # tampered with and could fail in the database
+        if cursor.created.tzinfo is None or not cursor.type.isidentifier():
+            msg = "Invalid cursor."
+            raise ParseError(msg)
+        return cursor
+
+
+def get_cursor_link(
+    request: Request,
+    query_param: str,
+    cursor: FeedCursor | None,
+) -> str | None:
+    """Build the absolute url of the page that starts after the cursor."""
+    if cursor is None:
+        return None
+    url = remove_query_param(request.build_absolute_uri(), "page")
+    return replace_query_param(url, query_param, cursor.encode())
+
+
+def encode_sync_token(timestamp: datetime) -> str:
+    """Encode the time of a sync as an opaque url safe token."""
+    return base64.urlsafe_b64encode(timestamp.isoformat().encode()).decode()
+
+
+def decode_sync_token(token: str) -> datetime:
+    """Decode a token created by `encode_sync_token`.
+
+    Raises a ParseError if the token is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token.encode()).decode()
+        timestamp = datetime.fromisoformat(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        msg = "Invalid sync token."
+        raise ParseError(msg) from e
+    # tokens are encoded from aware timestamps
+    if timestamp.tzinfo is None:
+        msg = "Invalid sync token."
+        raise ParseError(msg)
+    return timestamp
@@ -0,0 +1,332 @@
+"""Read only serialization of list pages from plain rows.
+
+Model serializers build every field of every row through DRF's field
+machinery, which dominates the time spent on large list pages. A row
+serializer instead selects the columns it needs as tuples and builds each
+response dict with a single function, producing the same output as the
+model serializer it stands in for.
+
+Row serializers only read, so viewsets opt in for their list action and
+keep using their model serializers for everything else.
+
+Sparse fieldsets are supported too: columns only read by omitted fields
+are not selected, and omitted fields are dropped from the rows.
+"""
+
+import abc
+import typing
+from collections.abc import Iterable
+from typing import Any, ClassVar
+
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db import models
+from rest_framework.fields import DateTimeField
+from rest_framework.response import Response
+from rest_framework.serializers import ModelSerializer
+
+from lore import serializers
+from lore.fieldsets import get_sparse_fields
+from lore.links import get_base_url, get_url_template
+from lore.models import Achievement, Image, LoreUser
+
+if typing.TYPE_CHECKING:
+    from django.core.files.storage import Storage
+    from rest_framework.request import Request
+
+# Unbound fields used for the values DRF formats with its own fields.
+DATETIME_FIELD = DateTimeField()
+
+
+class RowSerializer(abc.ABC):
+    """Serialize the rows of a queryset as plain dicts.
+
+    Subclasses name the serializer they match and list the columns to
+    select, in the order `to_representation` unpacks them. They may add the
+    annotations those columns need.
+    """
+
+    serializer_class: ClassVar[type[ModelSerializer]]
+    columns: ClassVar[tuple[str, ...]]
+    # Columns that are only read by a single field, keyed by column.
+    field_columns: ClassVar[dict[str, str]] = {}
+
+    def __init__(self, request: "Request") -> None:
+        """Resolve everything that is shared by the rows of the request."""
+        self.request = request
+        self.base_url = get_base_url(request)
+        self.fields = get_sparse_fields(
+            request,
+            self.serializer_class.Meta.fields,
+        )
+
+    def is_column_selected(self, column: str) -> bool:
+        """Return true if the column is read by a requested field."""
+        field = self.field_columns.get(column)
+        return self.fields is None or field is None or field in self.fields
+
+    def annotate(self, queryset: models.QuerySet) -> models.QuerySet:
+        """Add the annotations selected by the columns."""
+        return queryset
+
+    def get_rows(self, queryset: models.QuerySet) -> models.QuerySet:
+        """Select the columns of the rows instead of model instances.
+
+        Columns of omitted fields are replaced by nulls.
+        """
+        return self.annotate(queryset.prefetch_related(None)).values_list(
+            *(
+                column
+                if self.is_column_selected(column)
+                else models.Value(None, output_field=models.TextField())
+                for column in self.columns
+            ),
+        )
+
+    def serialize(
+        self,
+        rows: Iterable[tuple[Any, ...]],
+    ) -> list[dict[str, Any]]:
+        """Build the response dict of each row."""
+        to_representation = self.to_representation
+        if self.fields is None:
+            return [to_representation(row) for row in rows]
+        fields = self.fields
+        return [
+            {field: data[field] for field in fields}
+            for data in map(to_representation, rows)
+        ]
+
+    @abc.abstractmethod
+    def to_representation(self, row: tuple[Any, ...]) -> dict[str, Any]:
+        """Build the response dict of a row."""
+
+    def url_template(self, view_name: str, *kwargs: str) -> str:
+        """Get the absolute url template of the route."""
+        return self.base_url + get_url_template(view_name, *kwargs)
+
+    def file_url(self, storage: "Storage", name: str | None) -> str | None:
+        """Get the absolute url of a file, like DRF's `FileField`."""
+        if not name:
+            return None
+        return self.request.build_absolute_uri(storage.url(name))
+
+
+class UserRowSerializer(RowSerializer):
+    """Rows matching `UserSerializer`."""
+
+    serializer_class = serializers.UserSerializer
+    columns = ("id", "first_name", "last_name", "avatar")
+    field_columns: ClassVar[dict[str, str]] = {"avatar": "avatar"}
+
+    def __init__(self, request: "Request") -> None:
+        """Resolve the user url and the avatar storage."""
+        super().__init__(request)
+        self.user_url = self.url_template("loreuser-detail", "pk")
+        self.avatar_storage = LoreUser._meta.get_field("avatar").storage
+
+    def to_representation(self, row: tuple[Any, ...]) -> dict[str, Any]:
+        """Build the user's public information."""
+        pk, first_name, last_name, avatar = row
+        return {
+            "id": pk,
+            "first_name": first_name,
+            "last_name": last_name,
+            "avatar": self.file_url(self.avatar_storage, avatar),
+            "url": self.user_url.format(pk=pk),
+        }
+
+
+class QuoteRowSerializer(RowSerializer):
+    """Rows matching `QuoteSerializer`."""
+
+    serializer_class = serializers.QuoteSerializer
+    columns = (
+        "id",
+        "text",
+        "context",
+        "said_by_id",
+        "said_by__first_name",
+        "said_by__last_name",
+        "pinned",
+        "group_id",
+        "created",
+    )
+    field_columns: ClassVar[dict[str, str]] = {
+        "said_by__first_name": "said_by_username",
+        "said_by__last_name": "said_by_username",
+    }
+
+    def __init__(self, request: "Request") -> None:
+        """Resolve the quote, user and group urls."""
+        super().__init__(request)
+        self.quote_url = self.url_template("quote-detail", "pk")
+        self.user_url = self.url_template("loreuser-detail", "pk")
+        self.group_url = self.url_template("loregroup-detail", "pk")
+
+    def to_representation(self, row: tuple[Any, ...]) -> dict[str, Any]:
+        """Build the quote."""
+        (
+            pk,
+            text,
+            context,
+            said_by,
+            first_name,
+            last_name,
+            pinned,
+            group,
+            created,
+        ) = row
+        return {
+            "id": pk,
+            "text": text,
+            "context": context,
+            "said_by": said_by,
+            # matches `AbstractUser.get_full_name`
+            "said_by_username": f"{first_name} {last_name}".strip(),
+            "pinned": pinned,
+            "group": group,
+            "created": DATETIME_FIELD.to_representation(created),
+            "said_by_url": self.user_url.format(pk=said_by),
+            "group_url": self.group_url.format(pk=group),
+            "url": self.quote_url.format(pk=pk),
+        }
+
+
+class ImageRowSerializer(RowSerializer):
+    """Rows matching `ImageSerializer`."""
+
+    serializer_class = serializers.ImageSerializer
+    columns = ("id", "image", "description", "group_id", "created")
+    field_columns: ClassVar[dict[str, str]] = {"image": "image"}
+
+    def __init__(self, request: "Request") -> None:
+        """Resolve the image and group urls and the image storage."""
+        super().__init__(request)
+        self.image_url = self.url_template("image-detail", "pk")
+        self.group_url = self.url_template("loregroup-detail", "pk")
+        self.image_storage = Image._meta.get_field("image").storage
+
+    def to_representation(self, row: tuple[Any, ...]) -> dict[str, Any]:
+        """Build the image."""
+        pk, image, description, group, created = row
+        return {
+            "id": pk,
+            "image": self.file_url(self.image_storage, image),
+            "description": description,
+            "group": group,
+            "created": DATETIME_FIELD.to_representation(created),
+            "url": self.image_url.format(pk=pk),
+            "group_url": self.group_url.format(pk=group),
+        }
+
+
+class AchievementRowSerializer(RowSerializer):
+    """Rows matching `AchievementSerializer`.
+
+    Expects a queryset annotated by `with_achieved_by_user`, unless
+    `logged_in_user_url` is omitted.
+    """
+
+    serializer_class = serializers.AchievementSerializer
+    columns = (
+        "id",
+        "title",
+        "difficulty",
+        "description",
+        "achiever_ids",
+        "achiever_count",
+        "group_id",
+        "created",
+        "achieved_by_user",
+    )
+    field_columns: ClassVar[dict[str, str]] = {
+        "achiever_ids": "achieved_by",
+        "achiever_count": "num_achieved",
+        "achieved_by_user": "logged_in_user_url",
+    }
+
+    def __init__(self, request: "Request") -> None:
+        """Resolve the achievement, achievers and group urls."""
+        super().__init__(request)
+        self.achievement_url = self.url_template("achievement-detail", "pk")
+        self.achievers_url = self.url_template(
+            "achievement-loreuser-list",
+            "achievement_pk",
+        )
+        self.group_url = self.url_template("loregroup-detail", "pk")
+        self.achiever_url = self.url_template(
+            "achievement-loreuser-detail",
+            "achievement_pk",
+            "pk",
+        )
+
+    def annotate(self, queryset: models.QuerySet) -> models.QuerySet:
+        """Collect the ids of the achievers in a subquery."""
+        if not self.is_column_selected("achiever_ids"):
+            return queryset
+        achievers = Achievement.achieved_by.through.objects.filter(
+            achievement=models.OuterRef("pk"),
+        )
+        return queryset.annotate(
+            achiever_ids=ArraySubquery(
+                achievers.order_by("loreuser").values("loreuser"),
+            ),
+        )
+
+    def to_representation(self, row: tuple[Any, ...]) -> dict[str, Any]:
+        """Build the achievement."""
+        (
+            pk,
+            title,
+            difficulty,
+            description,
+            achiever_ids,
+            achiever_count,
+            group,
+            created,
+            achieved_by_user,
+        ) = row
+        logged_in_user_url = None
+        if achieved_by_user:
+            logged_in_user_url = self.achiever_url.format(
+                achievement_pk=pk,
+                pk=self.request.user.pk,
+            )
+        return {
+            "id": pk,
+            "title": title,
+            "difficulty": difficulty,
+            "description": description,
+            "achieved_by": achiever_ids,
+            "num_achieved": achiever_count,
+            "group": group,
+            "created": DATETIME_FIELD.to_representation(created),
+            "url": self.achievement_url.format(pk=pk),
+            "achievers_url": self.achievers_url.format(achievement_pk=pk),
+            "group_url": self.group_url.format(pk=group),
+            "logged_in_user_url": logged_in_user_url,
+        }
+
+
+class RowListMixin:
+    """List a viewset's items with its row serializer.
+
+    Viewsets opt in by setting `row_serializer_class`, which must match the
+    output of the serializer used by the list action.
+    """
+
+    row_serializer_class: ClassVar[type[RowSerializer] | None] = None
+
+    def list(self, request: "Request", *args: Any, **kwargs: Any) -> Response:
+        """List the items from plain rows."""
+        if self.row_serializer_class is None:
+            return super().list(request, *args, **kwargs)
+
+        row_serializer = self.row_serializer_class(request)
+        rows = row_serializer.get_rows(
+            self.filter_queryset(self.get_queryset()),
+        )
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(row_serializer.serialize(page))
+        return Response(row_serializer.serialize(rows))
@@ -0,0 +1,145 @@
+"""Ranked searches of items and of names.
+
+Items are searched in full text. `?search=` takes words and double quoted
+phrases. Every word and phrase must match, words also match as prefixes,
+so `ana eng` finds "analytical engine", and `"analytical engine"` only
+matches the two words in order.
+
+Names are searched by trigram similarity, so misspelled words still match
+and `lovlace` finds "Lovelace".
+
+Matches of either search are ordered by relevance.
+"""
+
+import functools
+import operator
+import re
+from typing import Any
+
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    TrigramWordSimilarity,
+)
+from django.db import models
+from django.db.models.functions import Greatest
+from rest_framework import filters
+from rest_framework.request import Request
+
+SEARCH_CONFIG = "english"
+
+# Words of a search, which also strips the operators of the tsquery syntax.
+WORD_RE = re.compile(r"\w+")
+# Double quoted phrases, or runs of text outside of quotes.
+TERM_RE = re.compile(r'"([^"]*)"?|([^"]+)')
+
+
+def build_tsquery(search: str) -> str:
+    """Build a tsquery that matches every word and phrase of the search.
+
+    Words match as prefixes, the words of a phrase must follow each other.
+    Returns an empty string if the search has no words.
+    """
+    terms: list[str] = []
+    for phrase, text in TERM_RE.findall(search):
+        if phrase:
+            words = WORD_RE.findall(phrase)
+            if words:
+                terms.append("({})".format(" <-> ".join(words)))
+        else:
+            terms.extend(f"{word}:*" for word in WORD_RE.findall(text))
+    return " & ".join(terms)
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """Search a stored search vector and order the matches by relevance.
+
+    Views may name the column with `search_vector_field`. The vector must
+    be built with `SEARCH_CONFIG`, and is expected to have a GIN index so
+    the cost of a search follows the number of matches, not of items.
+    """
+
+    default_search_vector_field = "search_vector"
+
+    search_description = (
+        "Words and double quoted phrases that must all match. Words also "
+        "match as prefixes."
+    )
+
+    def filter_queryset(
+        self,
+        request: Request,
+        queryset: models.QuerySet,
+        view: Any,
+    ) -> models.QuerySet:
+        """Keep the matching items, the most relevant first."""
+        search = request.query_params.get(self.search_param, "")
+        tsquery = build_tsquery(search)
+        if not tsquery:
+            return queryset
+
+        field: str = getattr(
+            view,
+            "search_vector_field",
+            self.default_search_vector_field,
+        )
+        query = SearchQuery(tsquery, config=SEARCH_CONFIG, search_type="raw")
+        ordering = queryset.query.order_by
+        return (
+            queryset.filter(**{field: query})
+            .annotate(search_rank=SearchRank(models.F(field), query))
+            .order_by("-search_rank", *ordering)
+        )
+
+
+class TrigramSearchFilter(filters.SearchFilter):
+    """Search the view's search fields by trigram word similarity.
+
+    Every word of the search must be similar to a word of one of the
+    fields, and matches are ordered by how similar they are. The fields are
+    expected to have a GIN index with the `gin_trgm_ops` operator class, so
+    the similarity lookups do not scan the table.
+    """
+
+    search_description = (
+        "Words that must all be similar to a word of the name, which "
+        "tolerates typos."
+    )
+
+    def filter_queryset(
+        self,
+        request: Request,
+        queryset: models.QuerySet,
+        view: Any,
+    ) -> models.QuerySet:
+        """Keep the similar items, the most similar first."""
+        search_fields = self.get_search_fields(view, request)
+        search = request.query_params.get(self.search_param, "")
+        words = WORD_RE.findall(search)
+        if not search_fields or not words:
+            return queryset
+
+        condition = models.Q()
+        similarities: list[models.Expression] = []
+        for word in words:
+            condition &= functools.reduce(
+                operator.or_,
+                (
+                    models.Q(**{f"{field}__trigram_word_similar": word})
+                    for field in search_fields
+                ),
+            )
+            field_similarities = [
+                TrigramWordSimilarity(word, field) for field in search_fields
+            ]
+            similarities.append(
+                Greatest(*field_similarities)
+                if len(field_similarities) > 1
+                else field_similarities[0],
+            )
+        ordering = queryset.query.order_by
+        return (
+            queryset.filter(condition)
+            .annotate(search_rank=functools.reduce(operator.add, similarities))
+            .order_by("-search_rank", *ordering)
+        )
@@ -2,24 +2,34 @@
 
 import contextlib
 import typing
-from typing import Any, ClassVar, cast, override
+from typing import Any, ClassVar, override
 
 from dj_rest_auth.registration.serializers import RegisterSerializer
 from django.http import HttpRequest
-from django.urls import reverse
 from rest_framework import serializers
 from rest_framework.relations import PrimaryKeyRelatedField
 
 from lore import models
+from lore.fieldsets import SparseFieldsMixin
+from lore.links import (
+    TemplateHyperlinkedIdentityField,
+    TemplateHyperlinkedRelatedField,
+    build_url,
+)
 
 if typing.TYPE_CHECKING:
+    from django.db.models import QuerySet
     from rest_framework.views import Request
 
 
 class UserSerializer(
+    SparseFieldsMixin,
     serializers.HyperlinkedModelSerializer,
 ):
     """A serializer for exposing public information about a user."""
+
+    serializer_url_field = TemplateHyperlinkedIdentityField
+
     class Meta:
         model = models.LoreUser
         fields: typing.ClassVar[list[str]] = [
@@ -67,7 +77,25 @@ class UserRegisterSerializer(RegisterSerializer):
         return user
 
 
-class QuoteSerializer(serializers.ModelSerializer):
+class MutualUserField(serializers.PrimaryKeyRelatedField):
+    """A user primary key limited to users sharing a group with the requester.
+
+    The queryset is only built when the field is used, such as when a write
+    is validated. Validating the user and checking that they are mutual
+    takes a single query, and the validated user is passed on so it is not
+    loaded again.
+    """
+
+    def get_queryset(self) -> "QuerySet[models.LoreUser, models.LoreUser]":
+        """Get the mutual users of the requesting user."""
+        request = self.context.get("request")
+        user = getattr(request, "user", None)
+        if not isinstance(user, models.LoreUser):
+            return models.LoreUser.users.none()
+        return user.get_mutual_users()
+
+
+class QuoteSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for the quote detail.
 
     Serializes the quote's:
@@ -82,14 +110,16 @@ class QuoteSerializer(serializers.ModelSerializer):
       - url
     """
 
-    said_by_url = serializers.HyperlinkedRelatedField(
+    serializer_url_field = TemplateHyperlinkedIdentityField
+
+    said_by_url = TemplateHyperlinkedRelatedField(
         view_name="loreuser-detail",
         lookup_field="pk",
         many=False,
         read_only=True,
         source="said_by",
     )
-    group_url = serializers.HyperlinkedRelatedField(
+    group_url = TemplateHyperlinkedRelatedField(
         view_name="loregroup-detail",
         lookup_field="pk",
         many=False,
@@ -97,40 +127,20 @@ class QuoteSerializer(serializers.ModelSerializer):
         source="group",
     )
 
+    said_by = MutualUserField()
+    group = serializers.PrimaryKeyRelatedField(read_only=True)
+
     said_by_username = serializers.SerializerMethodField();
     context = serializers.CharField(required=False, allow_blank=True)
     def get_said_by_username(self, obj):
         return obj.said_by.get_full_name()
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-
-        try:
-            # get users that are only in the shared group
-            user: models.LoreUser = cast(
-                models.LoreUser,
-                self.context["request"].user,
-            )
-
-            self.fields["said_by"] = serializers.PrimaryKeyRelatedField(
-                queryset=user.get_mutual_users(),
-                read_only=False,
-            )
-            self.fields["group"] = serializers.PrimaryKeyRelatedField(
-                read_only=True,
-            )
-        except KeyError:
-            pass
-        except AttributeError:
-            # user is anonymous and doesnt have the functions
-            pass
-
     def create(self, validated_data: dict[Any, Any]) -> models.Quote:
         """Create an instane of an Quote."""
         return models.Quote.quotes.create_quote(
             text=validated_data["text"],
             context=validated_data.get("context", ""),
-            said_by_pk=validated_data["said_by"].pk,
+            said_by=validated_data["said_by"],
             is_pinned=validated_data["pinned"],
             group=validated_data["group"],
         )
@@ -152,7 +162,7 @@ class QuoteSerializer(serializers.ModelSerializer):
         ]
 
 
-class ImageSerializer(serializers.ModelSerializer):
+class ImageSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for the image detail.
 
     Serializes the images's:
@@ -165,7 +175,9 @@ class ImageSerializer(serializers.ModelSerializer):
       - url
     """
 
-    group_url = serializers.HyperlinkedRelatedField(
+    serializer_url_field = TemplateHyperlinkedIdentityField
+
+    group_url = TemplateHyperlinkedRelatedField(
         view_name="loregroup-detail",
         lookup_field="pk",
         many=False,
@@ -204,7 +216,7 @@ class ImageSerializer(serializers.ModelSerializer):
 
 
 # TODO : add achieved urls to serializer
-class AchievementSerializer(serializers.ModelSerializer):
+class AchievementSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for the achievement detail.
 
     Serializes the achievement's:
@@ -220,7 +232,9 @@ class AchievementSerializer(serializers.ModelSerializer):
       - url (read only)
     """
 
-    group_url = serializers.HyperlinkedRelatedField(
+    serializer_url_field = TemplateHyperlinkedIdentityField
+
+    group_url = TemplateHyperlinkedRelatedField(
         view_name="loregroup-detail",
         lookup_field="pk",
         many=False,
@@ -231,7 +245,7 @@ class AchievementSerializer(serializers.ModelSerializer):
         choices=[1, 2, 3],
         help_text="1=Easy, 2=Medium, 3=Hard"
     )
-    achievers_url = serializers.HyperlinkedIdentityField(
+    achievers_url = TemplateHyperlinkedIdentityField(
         view_name="achievement-loreuser-list",
         lookup_field="pk",
         lookup_url_kwarg="achievement_pk",
@@ -239,7 +253,10 @@ class AchievementSerializer(serializers.ModelSerializer):
     )
     logged_in_user_url = serializers.SerializerMethodField()
 
-    num_achieved = serializers.ReadOnlyField()
+    num_achieved = serializers.IntegerField(
+        source="achiever_count",
+        read_only=True,
+    )
 
     def __init__(self, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
@@ -262,14 +279,18 @@ class AchievementSerializer(serializers.ModelSerializer):
     def get_logged_in_user_url(self, obj: models.Achievement) -> str | None:
         """Get the url for the authenticated user."""
         request: Request = self.context["request"]
-        if not obj.has_achiever(request.user):
+        if hasattr(obj, "achieved_by_user"):
+            achieved = obj.achieved_by_user
+        else:
+            achieved = obj.has_achiever(request.user)
+        if not achieved:
             return None
-        base_url = request.build_absolute_uri(
-            reverse(
-                "achievement-loreuser-detail", args=[obj.pk, request.user.pk]
-            ),
+        return build_url(
+            request,
+            "achievement-loreuser-detail",
+            achievement_pk=obj.pk,
+            pk=request.user.pk,
         )
-        return f"{base_url}"
 
     class Meta:
         model = models.Achievement
@@ -312,17 +333,19 @@ class AchievementUpdateSerializer(AchievementSerializer):
         extra_kwargs: ClassVar[dict[str, dict[str, Any]]] = {}
 
 
-class ChallengeSerializer(serializers.ModelSerializer):
+class ChallengeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for the challenge detail."""
 
-    group_url = serializers.HyperlinkedRelatedField(
+    serializer_url_field = TemplateHyperlinkedIdentityField
+
+    group_url = TemplateHyperlinkedRelatedField(
         view_name="loregroup-detail",
         lookup_field="pk",
         many=False,
         read_only=True,
         source="group",
     )
-    participants_url = serializers.HyperlinkedIdentityField(
+    participants_url = TemplateHyperlinkedIdentityField(
         view_name="challengeparticipant-list",
         lookup_field="pk",
         lookup_url_kwarg="challenge_pk",
@@ -358,15 +381,13 @@ class ChallengeSerializer(serializers.ModelSerializer):
         request: Request = self.context["request"]
         if not obj.has_participant(request.user):
             return None
-        base_url = request.build_absolute_uri(
-            reverse(
-                "challengeparticipant-detail",
-                args=[obj.pk, request.user.pk],
-            ),
+        return build_url(
+            request,
+            "challengeparticipant-detail",
+            challenge_pk=obj.pk,
+            pk=request.user.pk,
         )
 
-        return f"{base_url}"
-
     class Meta:
         model = models.Challenge
         fields: ClassVar[list[str]] = [
@@ -390,7 +411,10 @@ class ChallengeSerializer(serializers.ModelSerializer):
         # }
 
 
-class ChallengeParticipantSerializer(serializers.ModelSerializer):
+class ChallengeParticipantSerializer(
+    SparseFieldsMixin,
+    serializers.ModelSerializer,
+):
     """Serializes the user and whether they completed a challenge."""
 
     lore_user = UserSerializer(many=False, read_only=True)
@@ -421,6 +445,7 @@ class ChallengeUpdateSerializer(ChallengeSerializer):
 
 
 class GroupSerializer(
+    SparseFieldsMixin,
     serializers.ModelSerializer,
 ):
     """Serializes a group.
@@ -436,48 +461,53 @@ class GroupSerializer(
     - members (write only)
     """
 
-    members_url = serializers.HyperlinkedIdentityField(
+    serializer_url_field = TemplateHyperlinkedIdentityField
+
+    members_url = TemplateHyperlinkedIdentityField(
         view_name="loregroup-loreuser-list",
         lookup_field="pk",
         lookup_url_kwarg="loregroup_pk",
         many=False,
     )
-    quotes_url = serializers.HyperlinkedIdentityField(
+    quotes_url = TemplateHyperlinkedIdentityField(
         view_name="loregroup-quote-list",
         lookup_field="pk",
         lookup_url_kwarg="loregroup_pk",
         many=False,
     )
-    achievements_url = serializers.HyperlinkedIdentityField(
+    achievements_url = TemplateHyperlinkedIdentityField(
         view_name="loregroup-achievement-list",
         lookup_field="pk",
         lookup_url_kwarg="loregroup_pk",
         many=False,
     )
-    challenges_url = serializers.HyperlinkedIdentityField(
+    challenges_url = TemplateHyperlinkedIdentityField(
         view_name="loregroup-challenge-list",
         lookup_field="pk",
         lookup_url_kwarg="loregroup_pk",
         many=False,
     )
-    images_url = serializers.HyperlinkedIdentityField(
+    images_url = TemplateHyperlinkedIdentityField(
         view_name="loregroup-image-list",
         lookup_field="pk",
         lookup_url_kwarg="loregroup_pk",
         many=False,
     )
     logged_in_member_url = serializers.SerializerMethodField()
+    num_members = serializers.IntegerField(
+        source="member_count",
+        read_only=True,
+    )
 
     def get_logged_in_member_url(self, obj: models.LoreGroup) -> str:
         """Get the url to leave the group."""
         request: Request = self.context["request"]
-        base_url = request.build_absolute_uri(
-            reverse(
-                "loregroup-loreuser-detail",
-                args=[obj.pk, request.user.pk],
-            ),
+        return build_url(
+            request,
+            "loregroup-loreuser-detail",
+            loregroup_pk=obj.pk,
+            pk=request.user.pk,
         )
-        return f"{base_url}"
 
     def create(self, validated_data: dict[Any, Any]) -> models.LoreGroup:
         """Create an instane of an Group."""
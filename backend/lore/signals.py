@@ -0,0 +1,111 @@
+"""Signal handlers for the lore models."""
+
+from typing import Any
+
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from lore.cache import (
+    bump_group_version,
+    forget_user_group_ids,
+    get_user_group_ids,
+    invalidate_user_group_ids,
+)
+from lore.deletion import is_group_purging
+from lore.models import (
+    Achievement,
+    Challenge,
+    GroupItem,
+    Image,
+    LoreGroup,
+    LoreUser,
+    Quote,
+    Tombstone,
+)
+
+# Fields of a user shown in the responses of their groups.
+USER_PUBLIC_FIELDS = frozenset(
+    {"first_name", "last_name", "avatar", "deleted"},
+)
+
+
+@receiver(post_delete, sender=Quote)
+@receiver(post_delete, sender=Image)
+@receiver(post_delete, sender=Achievement)
+@receiver(post_delete, sender=Challenge)
+def record_tombstone(
+    instance: GroupItem,
+    origin: Any,
+    **_: Any,
+) -> None:
+    """Record the deletion of a group item.
+
+    This also runs for items deleted by a cascade, such as the quotes of a
+    deleted user. Items deleted along with their group, or while their
+    group is purged, are skipped, since the group's tombstones are deleted
+    as well.
+    """
+    if isinstance(origin, LoreGroup) or is_group_purging(instance.group_id):
+        return
+    Tombstone.tombstones.record(instance)
+
+
+@receiver(m2m_changed, sender=LoreGroup.members.through)
+def invalidate_memberships(
+    instance: LoreGroup | LoreUser,
+    action: str,
+    reverse: bool,  # noqa: FBT001 signal argument
+    pk_set: set[int] | None,
+    **_: Any,
+) -> None:
+    """Invalidate the cached group ids of users whose memberships changed.
+
+    Covers changes made from either side of the relation, such as the
+    admin adding members to a group.
+    """
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if reverse:
+        forget_user_group_ids(instance)
+        invalidate_user_group_ids([instance.pk])
+    elif action == "pre_clear":
+        invalidate_user_group_ids(
+            instance.members.values_list("pk", flat=True),
+        )
+    else:
+        invalidate_user_group_ids(pk_set or [])
+
+
+@receiver(pre_delete, sender=LoreGroup)
+def invalidate_group_memberships(instance: LoreGroup, **_: Any) -> None:
+    """Invalidate the cached group ids of the members of a deleted group.
+
+    Deleting a group deletes its memberships without any m2m signal.
+    """
+    invalidate_user_group_ids(instance.members.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=LoreUser)
+def invalidate_user_groups(
+    instance: LoreUser,
+    created: bool,  # noqa: FBT001 signal argument
+    update_fields: frozenset[str] | None,
+    **_: Any,
+) -> None:
+    """Invalidate the cached responses of the groups of an edited user.
+
+    Quotes and feeds of the groups show the user's name and avatar. Saves
+    of other fields, such as the last login, are skipped.
+    """
+    if created or (
+        update_fields is not None
+        and USER_PUBLIC_FIELDS.isdisjoint(update_fields)
+    ):
+        return
+    for group_id in get_user_group_ids(instance):
+        bump_group_version(group_id)
@@ -1,3 +1,2056 @@
-from django.test import TestCase
+import base64
+import contextlib
+import importlib
+import itertools
+import json
+import re
+from collections.abc import Callable, Iterable, Iterator
+from datetime import UTC, date, datetime, timedelta
+from io import StringIO
+from decimal import Decimal
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.apps import apps as django_apps
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    OperationalError,
+    connection,
+    connections,
+    transaction,
+)
+from django.http import Http404
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import set_script_prefix
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.relations import HyperlinkedRelatedField
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import (
+    APIRequestFactory,
+    APITestCase,
+    force_authenticate,
+)
+from rest_framework_simplejwt.tokens import AccessToken
+
+from lore import jobs, serializers, views
+from lore.deletion import delete_files
+from lore.links import TemplateHyperlinkedRelatedField
+from lore.management.commands.benchmark_links import reverse_url
+from lore.models import (
+    Achievement,
+    Activity,
+    AlreadyCompltedChallengeError,
+    Challenge,
+    GroupItem,
+    Image,
+    Job,
+    LoreGroup,
+    LoreUser,
+    Quote,
+    Tombstone,
+)
+from lore.pagination import decode_sync_token, encode_sync_token
+from lore.renderers import ORJSONRenderer
+
+
+class LoreTestCase(APITestCase):
+    """Sets up a group with two members, logged in as the first."""
+
+    def setUp(self) -> None:
+        """Create a group with two members, logged in as the first."""
+        cache.clear()
+        self.user = LoreUser.users.create_user(
+            "ada@example.com",
+            "Ada",
+            "Lovelace",
+            "password",
+        )
+        self.other_user = LoreUser.users.create_user(
+            "alan@example.com",
+            "Alan",
+            "Turing",
+            "password",
+        )
+        self.group = LoreGroup.groups.create_group(
+            name="Analytical",
+            owner=self.user,
+            avatar=None,
+            members=[self.other_user],
+            location="London",
+        )
+        self.client.force_authenticate(self.user)
+
+
+class QueryBudgetTestCase(LoreTestCase):
+    """Checks that list routes run a fixed number of queries.
+
+    Each route is requested with a small and a large page, and both must
+    stay within the route's budget.
+    """
+
+    def count_queries(self, url: str) -> int:
+        """Request the url and return the number of queries it ran.
+
+        The user is reloaded, like for each real request, so nothing loaded
+        by a previous request is reused.
+        """
+        cache.clear()
+        self.client.force_authenticate(LoreUser.users.get(pk=self.user.pk))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assert_query_budget(
+        self,
+        url: str,
+        budget: int,
+        create_items: Callable[[int], None],
+    ) -> None:
+        """Assert the url's queries do not grow with the page size."""
+        create_items(2)
+        small_page = self.count_queries(url)
+        create_items(18)
+        large_page = self.count_queries(url)
+        self.assertEqual(small_page, large_page)
+        self.assertLessEqual(large_page, budget)
+
+    def create_quotes(self, count: int) -> None:
+        """Create quotes said by both members."""
+        for i in range(count):
+            Quote.quotes.create_quote(
+                text=f"Quote {i}",
+                context=None,
+                said_by=[self.user, self.other_user][i % 2],
+                is_pinned=False,
+                group=self.group,
+            )
+
+    def test_group_quotes(self) -> None:
+        """List the quotes of a group."""
+        self.assert_query_budget(
+            f"/api/v1/groups/{self.group.pk}/quotes/",
+            3,
+            self.create_quotes,
+        )
+
+    def test_user_quotes(self) -> None:
+        """List the quotes of the logged in user."""
+        self.assert_query_budget("/api/v1/quotes/", 3, self.create_quotes)
+
+    def create_achievements(self, count: int) -> None:
+        """Create achievements achieved by both members."""
+        for i in range(count):
+            Achievement.achievements.create_achievement(
+                title=f"Achievement {i}",
+                description="",
+                difficulty=1,
+                achieved_by=[self.user, self.other_user],
+                group=self.group,
+            )
+
+    def test_group_achievements(self) -> None:
+        """List the achievements of a group."""
+        self.assert_query_budget(
+            f"/api/v1/groups/{self.group.pk}/achievements/",
+            3,
+            self.create_achievements,
+        )
+
+    def test_user_achievements(self) -> None:
+        """List the achievements of the logged in user."""
+        self.assert_query_budget(
+            "/api/v1/achievements/",
+            4,
+            self.create_achievements,
+        )
+
+    def create_groups(self, count: int) -> None:
+        """Create groups with both members."""
+        for _ in range(count):
+            LoreGroup.groups.create_group(
+                name=f"Group {LoreGroup.groups.count()}",
+                owner=self.user,
+                avatar=None,
+                members=[self.other_user],
+                location="London",
+            )
+
+    def test_groups(self) -> None:
+        """List the groups of the logged in user."""
+        self.assert_query_budget("/api/v1/groups/", 3, self.create_groups)
+
+    def create_feed_items(self, count: int) -> None:
+        """Create items of every type, with achievers and participants."""
+        for i in range(count):
+            Quote.quotes.create_quote(
+                text=f"Quote {i}",
+                context=None,
+                said_by=self.user,
+                is_pinned=False,
+                group=self.group,
+            )
+            Image.images.create_image(
+                image=f"group_images/{i}.png",
+                description=None,
+                group=self.group,
+            )
+            achievement = Achievement.achievements.create_achievement(
+                title=f"Achievement {i}",
+                description="",
+                difficulty=1,
+                achieved_by=[self.user, self.other_user],
+                group=self.group,
+            )
+            Challenge.challenges.create_challenge(
+                title=f"Challenge {i}",
+                description="",
+                level=1,
+                participants=[self.user, self.other_user],
+                achievement=achievement,
+                start_date=date(1843, 1, 1),
+                end_date=date(1843, 12, 31),
+                group=self.group,
+            )
+
+    def test_expanded_feed(self) -> None:
+        """Expand a page of the feed with a fixed number of queries.
+
+        The items of each type are loaded with their relations in one query,
+        plus one per prefetched relation.
+        """
+        self.assert_query_budget(
+            "/api/v1/feed/?expand=1",
+            10,
+            self.create_feed_items,
+        )
+
+    def test_expanded_feed_cursor(self) -> None:
+        """Expand a cursor page of the feed with one query per item type."""
+        self.assert_query_budget(
+            "/api/v1/feed/?expand=1&cursor=",
+            9,
+            self.create_feed_items,
+        )
+
+
+class ItemsTestCase(LoreTestCase):
+    """Sets up items of every kind and compares list serializers."""
+
+    def setUp(self) -> None:
+        """Create a few items of every kind with files and achievers."""
+        super().setUp()
+        self.user.avatar = "avatars/ada.png"
+        self.user.save()
+        for i in range(3):
+            Quote.quotes.create_quote(
+                text=f"Quote {i}",
+                context="At dinner" if i else None,
+                said_by=self.user,
+                is_pinned=i == 0,
+                group=self.group,
+            )
+            # saving a file name skips the upload to the storage
+            Image(
+                image=f"group_images/{i}.png",
+                description=f"Image {i}",
+                group=self.group,
+            ).save()
+            Achievement.achievements.create_achievement(
+                title=f"Achievement {i}",
+                description="",
+                difficulty=i + 1,
+                achieved_by=[self.other_user, self.user][i:],
+                group=self.group,
+            )
+
+    def assert_parity(self, url: str, viewset: type) -> None:
+        """Assert the url's response is the same with either serializer."""
+        cache.clear()
+        rows = self.client.get(url)
+        cache.clear()
+        with mock.patch.object(viewset, "row_serializer_class", None):
+            instances = self.client.get(url)
+        self.assertEqual(rows.status_code, 200)
+        self.assertTrue(rows.json()["results"])
+        self.assertEqual(rows.json(), instances.json())
+
+
+class RowSerializerTestCase(ItemsTestCase):
+    """Checks that row serializers match the serializers they replace."""
+
+    def test_quotes(self) -> None:
+        """List quotes as rows."""
+        self.assert_parity(
+            f"/api/v1/groups/{self.group.pk}/quotes/",
+            views.GroupQuoteViewSet,
+        )
+        self.assert_parity("/api/v1/quotes/", views.AllUserGroupsQuoteViewSet)
+
+    def test_images(self) -> None:
+        """List images as rows."""
+        self.assert_parity(
+            f"/api/v1/groups/{self.group.pk}/images/",
+            views.ImageViewSet,
+        )
+
+    def test_members(self) -> None:
+        """List users as rows."""
+        self.assert_parity(
+            f"/api/v1/groups/{self.group.pk}/members/",
+            views.MemberViewSet,
+        )
+
+    def test_achievements(self) -> None:
+        """List achievements as rows."""
+        self.assert_parity(
+            f"/api/v1/groups/{self.group.pk}/achievements/",
+            views.AchievementViewSet,
+        )
+        self.assert_parity("/api/v1/achievements/", views.AchievementViewSet)
+
+
+class RendererTestCase(LoreTestCase):
+    """Checks that JSON is rendered and streamed like DRF renders it."""
+
+    def test_render(self) -> None:
+        """Render the types DRF's encoder handles."""
+        data = {
+            "text": "Ada \u2028 Lovelace \u2029 é",
+            "created": datetime(1843, 7, 10, 12, 30, 15, 123456, tzinfo=UTC),
+            "amount": Decimal("1.5"),
+            "message": gettext_lazy("Not found."),
+            "items": [{"id": 1, "pinned": True, "context": None}],
+        }
+        self.assertEqual(
+            ORJSONRenderer().render(data),
+            JSONRenderer().render(data),
+        )
+
+    def test_streamed_sync(self) -> None:
+        """Stream a sync, unless indented JSON is requested."""
+        for i in range(3):
+            Quote.quotes.create_quote(
+                text=f"Quote {i}",
+                context=None,
+                said_by=self.user,
+                is_pinned=False,
+                group=self.group,
+            )
+        url = f"/api/v1/groups/{self.group.pk}/sync/"
+
+        streamed = self.client.get(url)
+        self.assertTrue(streamed.streaming)
+        streamed_data = json.loads(b"".join(streamed.streaming_content))
+
+        rendered = self.client.get(url, HTTP_ACCEPT="application/json; indent=2")
+        self.assertFalse(rendered.streaming)
+        rendered_data = rendered.json()
+
+        self.assertEqual(len(streamed_data["quotes"]), 3)
+        del streamed_data["token"], rendered_data["token"]
+        self.assertEqual(streamed_data, rendered_data)
+
+    async def test_asgi_sync(self) -> None:
+        """Stream a sync chunk by chunk under ASGI."""
+        for i in range(3):
+            await sync_to_async(Quote.quotes.create_quote)(
+                text=f"Quote {i}",
+                context=None,
+                said_by=self.user,
+                is_pinned=False,
+                group=self.group,
+            )
+        url = f"/api/v1/groups/{self.group.pk}/sync/"
+        self.async_client.cookies["jwt-auth"] = str(
+            AccessToken.for_user(self.user),
+        )
+
+        with mock.patch("lore.views.groups.SYNC_CHUNK_SIZE", 1):
+            response = await self.async_client.get(url)
+            self.assertTrue(response.is_async)
+            chunks = [chunk async for chunk in response.streaming_content]
+        self.assertGreater(len(chunks), 3)
+        streamed_data = json.loads(b"".join(chunks))
+        self.assertEqual(
+            [quote["text"] for quote in streamed_data["quotes"]],
+            ["Quote 0", "Quote 1", "Quote 2"],
+        )
+
+
+class SparseFieldsTestCase(ItemsTestCase):
+    """Checks that `fields` and `omit` select the fields of responses."""
+
+    def get_queries(self, url: str) -> list[str]:
+        """Request the url and return the queries it ran."""
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        return [query["sql"] for query in queries]
+
+    def test_quote_fields(self) -> None:
+        """Select quote fields without joining the speaker."""
+        url = f"/api/v1/groups/{self.group.pk}/quotes/?fields=text,pinned"
+        self.assert_parity(url, views.GroupQuoteViewSet)
+        quote = self.client.get(url).json()["results"][0]
+        self.assertEqual(list(quote), ["id", "text", "pinned"])
+        for sql in self.get_queries(url):
+            self.assertNotIn('"lore_loreuser"', sql)
+
+    def test_achievement_omit(self) -> None:
+        """Omit achievement fields without counting achievers."""
+        omitted = ["achieved_by", "num_achieved", "logged_in_user_url", "id"]
+        url = f"/api/v1/groups/{self.group.pk}/achievements/?omit=" + ",".join(
+            omitted,
+        )
+        self.assert_parity(url, views.AchievementViewSet)
+        achievement = self.client.get(url).json()["results"][0]
+        self.assertIn("id", achievement)
+        self.assertTrue(set(achievement).isdisjoint(omitted[:-1]))
+        for sql in self.get_queries(url):
+            self.assertNotIn('"lore_achievement_achieved_by"', sql)
+
+    def test_group_detail(self) -> None:
+        """Select fields of a single item."""
+        response = self.client.get(
+            f"/api/v1/groups/{self.group.pk}/?fields=name,unknown",
+        )
+        self.assertEqual(
+            response.json(),
+            {"id": self.group.pk, "name": "Analytical"},
+        )
+
+    def test_write(self) -> None:
+        """Respond to writes with every field."""
+        response = self.client.post(
+            f"/api/v1/groups/{self.group.pk}/quotes/?fields=id",
+            {"text": "Hello", "said_by": self.other_user.pk, "pinned": False},
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertIn("said_by_username", response.json())
+
+
+@override_settings(MEMBERSHIP_CACHE_TIMEOUT=60)
+class MembershipCacheTestCase(LoreTestCase):
+    """Checks that memberships are loaded once and invalidated on changes."""
+
+    def setUp(self) -> None:
+        """Create a second group the user is not a member of."""
+        super().setUp()
+        self.other_group = LoreGroup.groups.create_group(
+            name="Bletchley",
+            owner=self.other_user,
+            avatar=None,
+            members=[],
+            location="Bletchley",
+        )
+        self.quote = Quote.quotes.create_quote(
+            text="Hello",
+            context=None,
+            said_by=self.user,
+            is_pinned=False,
+            group=self.group,
+        )
+
+    def get_membership_queries(self, url: str) -> tuple[int, int]:
+        """Request the url as a reloaded user.
+
+        Returns the status code and the number of membership queries.
+        """
+        self.client.force_authenticate(LoreUser.users.get(pk=self.user.pk))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        membership_queries = [
+            query
+            for query in queries
+            if '"lore_loregroup_members"' in query["sql"]
+        ]
+        return response.status_code, len(membership_queries)
+
+    @override_settings(MEMBERSHIP_CACHE_TIMEOUT=0)
+    def test_loaded_once_per_request(self) -> None:
+        """Check the route and item permissions with a single query."""
+        url = f"/api/v1/groups/{self.group.pk}/quotes/{self.quote.pk}/"
+        self.assertEqual(self.get_membership_queries(url), (200, 1))
+        self.assertEqual(self.get_membership_queries(url), (200, 1))
+
+    def test_cached_across_requests(self) -> None:
+        """Reuse the memberships loaded by a previous request."""
+        url = f"/api/v1/groups/{self.group.pk}/quotes/{self.quote.pk}/"
+        self.assertEqual(self.get_membership_queries(url), (200, 1))
+        self.assertEqual(self.get_membership_queries(url), (200, 0))
+
+    def test_join_and_leave(self) -> None:
+        """Invalidate the cached memberships when the user joins or leaves."""
+        url = f"/api/v1/groups/{self.other_group.pk}/quotes/"
+        self.assertEqual(self.get_membership_queries(url)[0], 403)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/v1/groups/join/",
+                {"join_code": self.other_group.join_code},
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.get_membership_queries(url), (200, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(
+                f"/api/v1/groups/{self.other_group.pk}/members/{self.user.pk}/",
+            )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.get_membership_queries(url), (403, 1))
+
+
+class MutualPermissionTestCase(LoreTestCase):
+    """Checks that user routes are limited to users sharing a group."""
+
+    def setUp(self) -> None:
+        """Create a group and quote the user is not part of."""
+        super().setUp()
+        self.stranger = LoreUser.users.create_user(
+            "grace@example.com",
+            "Grace",
+            "Hopper",
+            "password",
+        )
+        self.other_group = LoreGroup.groups.create_group(
+            name="Harvard",
+            owner=self.stranger,
+            avatar=None,
+            members=[],
+            location="Cambridge",
+        )
+        self.other_quote = Quote.quotes.create_quote(
+            text="It's easier to ask forgiveness",
+            context=None,
+            said_by=self.stranger,
+            is_pinned=False,
+            group=self.other_group,
+        )
+
+    def get_permission_queries(self, url: str) -> tuple[int, int]:
+        """Request the url and return its status and permission queries."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        permission_queries = [
+            query for query in queries if "lore_loregroup" in query["sql"]
+        ]
+        return response.status_code, len(permission_queries)
+
+    def test_filters(self) -> None:
+        """Check every filter of a request in one query."""
+        achievement = Achievement.achievements.create_achievement(
+            title="Program",
+            description="",
+            difficulty=1,
+            achieved_by=[self.user],
+            group=self.group,
+        )
+        self.assertEqual(
+            self.get_permission_queries(
+                f"/api/v1/users/?member_of={self.group.pk}"
+                f"&achievement={achievement.pk}&quote=0",
+            ),
+            (200, 1),
+        )
+        self.assertEqual(
+            self.get_permission_queries(
+                f"/api/v1/users/?member_of={self.group.pk}"
+                f"&quote={self.other_quote.pk}",
+            ),
+            (403, 1),
+        )
+        response = self.client.get("/api/v1/users/?quote=first")
+        self.assertEqual(response.status_code, 400)
+
+    def test_mutual_users(self) -> None:
+        """Only allow users that share a group."""
+        self.assertEqual(
+            self.get_permission_queries(f"/api/v1/users/{self.other_user.pk}/"),
+            (200, 1),
+        )
+        self.assertEqual(
+            self.get_permission_queries(f"/api/v1/users/{self.stranger.pk}/"),
+            (403, 1),
+        )
+        self.assertEqual(
+            self.get_permission_queries(f"/api/v1/users/{self.user.pk}/"),
+            (200, 0),
+        )
+
+    def test_quote_speaker(self) -> None:
+        """Load and check the speaker of a new quote in one query."""
+        url = f"/api/v1/groups/{self.group.pk}/quotes/"
+        for said_by, status in ((self.other_user, 201), (self.stranger, 400)):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(
+                    url,
+                    {"text": "Hello", "said_by": said_by.pk, "pinned": False},
+                )
+            self.assertEqual(response.status_code, status)
+            user_queries = [
+                query
+                for query in queries
+                if 'FROM "lore_loreuser"' in query["sql"]
+            ]
+            self.assertEqual(len(user_queries), 1)
+
+
+class CounterTestCase(LoreTestCase):
+    """Checks that the stored counters follow their relations."""
+
+    def setUp(self) -> None:
+        """Create an achievement and a challenge to count."""
+        super().setUp()
+        self.achievement = Achievement.achievements.create_achievement(
+            title="Program",
+            description="",
+            difficulty=1,
+            achieved_by=[self.user],
+            group=self.group,
+        )
+        self.challenge = Challenge.challenges.create_challenge(
+            title="Publish",
+            description="",
+            level=1,
+            participants=[self.user, self.other_user],
+            achievement=self.achievement,
+            start_date=date(1843, 1, 1),
+            end_date=date(1843, 12, 31),
+            group=self.group,
+        )
+
+    def assert_counts(self, members: int, achievers: int) -> None:
+        """Assert the stored counts, reloaded from the database."""
+        self.group.refresh_from_db()
+        self.achievement.refresh_from_db()
+        self.assertEqual(self.group.num_members, members)
+        self.assertEqual(self.achievement.num_achieved, achievers)
+        self.assertEqual(self.group.members.count(), members)
+        self.assertEqual(self.achievement.achieved_by.count(), achievers)
+
+    def test_counts(self) -> None:
+        """Count rows added and removed from either side of a relation."""
+        self.assert_counts(2, 1)
+        self.assertEqual(self.challenge.num_participants, 2)
+
+        self.assertTrue(self.achievement.add_achiever(self.other_user))
+        self.assertEqual(self.achievement.num_achieved, 2)
+        self.assertTrue(self.achievement.remove_achiever(self.user))
+        self.assert_counts(2, 1)
+
+        grace = LoreUser.users.create_user(
+            "grace@example.com",
+            "Grace",
+            "Hopper",
+            "password",
+        )
+        grace.member_of.add(self.group)
+        self.assert_counts(3, 1)
+
+        # cascades delete the memberships and achievements of the user
+        self.other_user.delete()
+        self.assert_counts(2, 0)
+
+    def test_stale_save(self) -> None:
+        """Saving an instance loaded before a change keeps the count."""
+        stale = LoreGroup.groups.get(pk=self.group.pk)
+        self.group.leave_group(self.other_user)
+        stale.name = "Difference"
+        stale.save()
+        self.assert_counts(1, 1)
+
+    def test_reconcile(self) -> None:
+        """Fix counters that drifted."""
+        LoreGroup.groups.filter(pk=self.group.pk).update(member_count=7)
+        Challenge.challenges.update(participant_count=0)
+
+        out = StringIO()
+        call_command("reconcile_counters", "--dry-run", stdout=out)
+        self.assertIn("Found 1 drifted loregroup member_counts", out.getvalue())
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.num_members, 7)
+
+        call_command("reconcile_counters", stdout=StringIO())
+        self.assert_counts(2, 1)
+        self.challenge.refresh_from_db()
+        self.assertEqual(self.challenge.num_participants, 2)
+
+
+class QueryPlanTestCase(LoreTestCase):
+    """Checks that list routes read their items through an index.
+
+    Postgres scans small tables sequentially, so plans are only checked
+    against enough items, in enough groups, to make the indexes pay off.
+    """
+
+    GROUPS = 100
+    ITEMS_PER_GROUP = 50
+
+    def setUp(self) -> None:
+        """Fill many groups with items, a few of which are the user's."""
+        super().setUp()
+        groups = LoreGroup.groups.bulk_create(
+            LoreGroup(name=f"Group {i}", join_code=f"{i:08}")
+            for i in range(self.GROUPS)
+        )
+        LoreGroup.members.through.objects.bulk_create(
+            LoreGroup.members.through(loregroup=group, loreuser=user)
+            for i, group in enumerate(groups)
+            for user in [self.other_user, self.user][: 2 if i < 3 else 1]
+        )
+        groups.append(self.group)
+        items = range(self.ITEMS_PER_GROUP)
+        quotes = Quote.quotes.bulk_create(
+            Quote(
+                text=f"Quote {i}",
+                said_by=self.user if i % 10 == 0 else self.other_user,
+                pinned=i % 50 == 0,
+                group=group,
+            )
+            for group in groups
+            for i in items
+        )
+        images = Image.images.bulk_create(
+            Image(image=f"group_images/{i}.png", group=group)
+            for group in groups
+            for i in items
+        )
+        achievements = Achievement.achievements.bulk_create(
+            Achievement(title=f"Achievement {i}", description="", group=group)
+            for group in groups
+            for i in items
+        )
+        Achievement.achieved_by.through.objects.bulk_create(
+            Achievement.achieved_by.through(
+                achievement=achievement,
+                loreuser=self.user,
+            )
+            for achievement in achievements[::20]
+        )
+        challenges = Challenge.challenges.bulk_create(
+            Challenge(
+                title=f"Challenge {i}",
+                description="",
+                level=1,
+                achievement=achievement,
+                start_date=date(1843, 1, 1),
+                end_date=date(1843, 12, 31),
+                group=achievement.group,
+            )
+            for i, achievement in enumerate(achievements)
+        )
+        Activity.activities.record_many(
+            [*quotes, *images, *achievements, *challenges],
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def explain_list(
+        self,
+        viewset: type,
+        params: dict[str, str] | None = None,
+        **kwargs: str,
+    ) -> str:
+        """Explain the query of the first page listed by the viewset."""
+        request = APIRequestFactory().get("/", params)
+        force_authenticate(request, self.user)
+        view = viewset(action_map={"get": "list"}, kwargs=kwargs)
+        view.request = view.initialize_request(request)
+        view.format_kwarg = None
+        queryset = view.filter_queryset(view.get_queryset())
+        return str(queryset[: view.paginator.page_size].explain())
+
+    def test_list_plans(self) -> None:
+        """Read every list page through an index of the item table."""
+        group_pk = str(self.group.pk)
+        routes = [
+            (views.GroupQuoteViewSet, None, {"loregroup_pk": group_pk}),
+            (
+                views.GroupQuoteViewSet,
+                {"pinned": "true"},
+                {"loregroup_pk": group_pk},
+            ),
+            (views.AllUserGroupsQuoteViewSet, None, {}),
+            (views.AllUserGroupsQuoteViewSet, {"search": "quote 7"}, {}),
+            (views.ImageViewSet, None, {"loregroup_pk": group_pk}),
+            (views.ImageViewSet, None, {}),
+            (views.AchievementViewSet, None, {"loregroup_pk": group_pk}),
+            (views.AchievementViewSet, None, {}),
+            (views.ChallengeViewSet, None, {"loregroup_pk": group_pk}),
+            (views.ChallengeViewSet, None, {}),
+        ]
+        for viewset, params, kwargs in routes:
+            table = viewset.serializer_class.Meta.model._meta.db_table
+            with self.subTest(viewset=viewset.__name__, params=params):
+                plan = self.explain_list(viewset, params, **kwargs)
+                self.assertNotRegex(plan, rf"Seq Scan on {table}\b")
+
+    def explain_feed(self, params: dict[str, str]) -> str:
+        """Explain the query of the feed page, with the rows it read."""
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/v1/feed/", params)
+        self.assertEqual(response.status_code, 200)
+        [query] = [
+            query
+            for query in queries
+            if 'FROM "lore_activity"' in query["sql"]
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN ANALYZE {query['sql']}")
+            return "\n".join(row[0] for row in cursor.fetchall())
+
+    def test_feed_plans(self) -> None:
+        """Read no more than a page of activities from each group."""
+        response = self.client.get("/api/v1/feed/", {"cursor": ""})
+        cursor = parse_qs(urlparse(response.json()["next"]).query)["cursor"]
+        for params in [
+            {"cursor": ""},
+            {"cursor": cursor[0]},
+            {"cursor": "", "group_id": str(self.group.pk)},
+            {"cursor": cursor[0], "group_id": str(self.group.pk)},
+        ]:
+            with self.subTest(params=params):
+                plan = self.explain_feed(params)
+                self.assertIn("lore_activity_group_created", plan)
+                # the rows are sorted by the index, not all at once
+                self.assertNotRegex(plan, r"(?<!Incremental )Sort  \(")
+                self.assertNotRegex(plan, r"Seq Scan on lore_activity\b")
+                for rows in re.findall(
+                    r"Index Scan .* on lore_activity .*rows=(\d+) loops",
+                    plan,
+                ):
+                    self.assertLessEqual(int(rows), 100)
+                if params["cursor"]:
+                    self.assertIn("created <=", plan)
+
+
+class QuoteSearchTestCase(LoreTestCase):
+    """Checks the full text search of quotes."""
+
+    def setUp(self) -> None:
+        """Create quotes that match a search to different degrees."""
+        super().setUp()
+        for text, context in [
+            ("The engine weaves algebraic patterns", "On the loom"),
+            ("Machines can think", "About the analytical engine"),
+            ("The analytical engine has no pretensions", None),
+            ("Poetical science", None),
+        ]:
+            Quote.quotes.create_quote(
+                text=text,
+                context=context,
+                said_by=self.user,
+                is_pinned=False,
+                group=self.group,
+            )
+
+    def search(self, search: str) -> list[str]:
+        """Search the quotes of the group and return their texts."""
+        response = self.client.get(
+            f"/api/v1/groups/{self.group.pk}/quotes/",
+            {"search": search},
+        )
+        self.assertEqual(response.status_code, 200)
+        return [quote["text"] for quote in response.json()["results"]]
+
+    def test_words(self) -> None:
+        """Match every word, as prefixes, ranking the text first."""
+        self.assertEqual(
+            self.search("analyt engines"),
+            [
+                "The analytical engine has no pretensions",
+                "Machines can think",
+            ],
+        )
+        self.assertEqual(self.search("poet"), ["Poetical science"])
+
+    def test_phrase(self) -> None:
+        """Match the words of a phrase in order."""
+        self.assertEqual(
+            self.search('"engine weaves"'),
+            ["The engine weaves algebraic patterns"],
+        )
+        self.assertEqual(self.search('"weaves engine"'), [])
+
+    def test_syntax(self) -> None:
+        """Ignore the operators of the tsquery syntax."""
+        self.assertEqual(self.search("science & | ! :*("), ["Poetical science"])
+        self.assertEqual(len(self.search("&")), 4)
+
+
+class NameSearchTestCase(LoreTestCase):
+    """Checks the fuzzy search of user and group names."""
+
+    def setUp(self) -> None:
+        """Add a member to the group, and a user outside of it."""
+        super().setUp()
+        self.member = LoreUser.users.create_user(
+            "charles@example.com",
+            "Charles",
+            "Babbage",
+            "password",
+        )
+        self.member.member_of.add(self.group)
+        LoreUser.users.create_user(
+            "grace@example.com",
+            "Grace",
+            "Hopper",
+            "password",
+        )
+
+    def search(self, url: str, search: str) -> list[str]:
+        """Search the url and return the ids of the results."""
+        response = self.client.get(url, {"search": search})
+        self.assertEqual(response.status_code, 200)
+        return [result["id"] for result in response.json()["results"]]
+
+    def test_users(self) -> None:
+        """Find mutual users with misspelled names."""
+        self.assertEqual(
+            self.search("/api/v1/users/", "lovlace"),
+            [self.user.pk],
+        )
+        self.assertEqual(
+            self.search("/api/v1/users/", "charls babage"),
+            [self.member.pk],
+        )
+        self.assertEqual(self.search("/api/v1/users/", "hopper"), [])
+
+    def test_groups(self) -> None:
+        """Find the user's groups with misspelled names."""
+        LoreGroup.groups.create_group(
+            name="Difference",
+            owner=self.other_user,
+            avatar=None,
+            members=[],
+            location="London",
+        )
+        self.assertEqual(
+            self.search("/api/v1/groups/", "analitical"),
+            [self.group.pk],
+        )
+        self.assertEqual(self.search("/api/v1/groups/", "diference"), [])
+
+
+class QuoteImportTestCase(LoreTestCase):
+    """Checks the bulk import of quotes."""
+
+    def import_file(self, content: str, import_format: str) -> list[dict]:
+        """Upload the file and return the reported progress."""
+        upload = SimpleUploadedFile("export.txt", content.encode())
+        response = self.client.post(
+            f"/api/v1/groups/{self.group.pk}/quotes/import/",
+            {"file": upload, "format": import_format},
+        )
+        self.assertEqual(response.status_code, 200)
+        return [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).splitlines()
+        ]
+
+    @mock.patch("lore.imports.IMPORT_BATCH_SIZE", 2)
+    def test_jsonl(self) -> None:
+        """Import valid lines in batches and report the others."""
+        grace = "Grace Hopper"
+        lines = [
+            {"text": "Numbers", "said_by": self.user.pk, "pinned": True},
+            {"text": "Machines", "said_by": "alan  turing", "context": "On"},
+            {"text": "Nobody", "said_by": grace},
+            {"text": "Computing", "said_by": self.other_user.pk},
+        ]
+        content = "\n".join(json.dumps(line) for line in lines)
+        progress = self.import_file(f"{content}\nnot json\n\n", "jsonl")
+
+        self.assertEqual(
+            progress,
+            [
+                {"imported": 2, "skipped": 0},
+                {"imported": 3, "skipped": 2},
+                {
+                    "imported": 3,
+                    "skipped": 2,
+                    "errors": [
+                        {"line": 3, "error": f"Unknown speaker {grace!r}."},
+                        {"line": 5, "error": "Expected a JSON object."},
+                    ],
+                    "done": True,
+                },
+            ],
+        )
+        quotes = Quote.quotes.filter(group=self.group).order_by("pk")
+        self.assertEqual(
+            list(quotes.values_list("text", "said_by", "context", "pinned")),
+            [
+                ("Numbers", self.user.pk, "", True),
+                ("Machines", self.other_user.pk, "On", False),
+                ("Computing", self.other_user.pk, "", False),
+            ],
+        )
+        # imported quotes show up in the feed
+        feed = self.client.get("/api/v1/feed/").json()
+        self.assertEqual(feed["count"], 3)
+
+    @mock.patch("lore.imports.IMPORT_BATCH_SIZE", 2)
+    async def test_asgi_progress(self) -> None:
+        """Report each batch under ASGI as soon as it is imported."""
+        content = "\n".join(
+            json.dumps({"text": f"Quote {i}", "said_by": self.user.pk})
+            for i in range(4)
+        )
+        upload = SimpleUploadedFile("export.jsonl", content.encode())
+        self.async_client.cookies["jwt-auth"] = str(
+            AccessToken.for_user(self.user),
+        )
+        response = await self.async_client.post(
+            f"/api/v1/groups/{self.group.pk}/quotes/import/",
+            {"file": upload, "format": "jsonl"},
+        )
+        self.assertTrue(response.is_async)
+
+        quotes = Quote.quotes.filter(group=self.group)
+        progress = aiter(response.streaming_content)
+        first = json.loads(await anext(progress))
+        self.assertEqual(first, {"imported": 2, "skipped": 0})
+        self.assertEqual(await quotes.acount(), 2)
+        rest = [json.loads(line) async for line in progress]
+        self.assertEqual(rest[-1]["imported"], 4)
+        self.assertEqual(await quotes.acount(), 4)
+
+    def test_chat(self) -> None:
+        """Import multi line messages of known speakers."""
+        content = (
+            "12/10/43, 9:15 PM - Ada Lovelace: The engine\n"
+            "weaves patterns\n"
+            "[12/10/43, 21:16:03] Alan Turing: Can machines think?\n"
+            "Note: a continued line\n"
+            "12/10/43, 21:17 - Charles Babbage: Unknown\n"
+            "Ada Lovelace: Poetical science\n"
+        )
+        progress = self.import_file(content, "chat")
+
+        self.assertEqual(progress[-1]["imported"], 3)
+        self.assertEqual(progress[-1]["skipped"], 1)
+        quotes = Quote.quotes.filter(group=self.group).order_by("pk")
+        self.assertEqual(
+            list(quotes.values_list("text", "said_by")),
+            [
+                ("The engine\nweaves patterns", self.user.pk),
+                (
+                    "Can machines think?\nNote: a continued line",
+                    self.other_user.pk,
+                ),
+                ("Poetical science", self.user.pk),
+            ],
+        )
+
+    def test_chat_system_messages(self) -> None:
+        """Skip timestamped lines without a speaker."""
+        content = (
+            "12/10/43, 9:15 PM - Ada Lovelace: The engine\n"
+            "12/10/43, 9:16 PM - Ada Lovelace added Alan Turing\n"
+            "[12/10/43, 21:16:03] Messages are end-to-end encrypted.\n"
+            "12/10/43, 21:17 - Alan Turing: Can machines think?\n"
+        )
+        progress = self.import_file(content, "chat")
+
+        self.assertEqual(progress[-1]["imported"], 2)
+        self.assertEqual(progress[-1]["skipped"], 0)
+        quotes = Quote.quotes.filter(group=self.group).order_by("pk")
+        self.assertEqual(
+            list(quotes.values_list("text", "said_by")),
+            [
+                ("The engine", self.user.pk),
+                ("Can machines think?", self.other_user.pk),
+            ],
+        )
+
+    def test_not_member(self) -> None:
+        """Only members of the group can import into it."""
+        outsider = LoreUser.users.create_user(
+            "grace@example.com",
+            "Grace",
+            "Hopper",
+            "password",
+        )
+        self.client.force_authenticate(outsider)
+        upload = SimpleUploadedFile("export.jsonl", b"")
+        response = self.client.post(
+            f"/api/v1/groups/{self.group.pk}/quotes/import/",
+            {"file": upload},
+        )
+        self.assertEqual(response.status_code, 403)
+
+
+class AchieverBatchTestCase(LoreTestCase):
+    """Checks awarding and revoking an achievement for many users."""
+
+    def setUp(self) -> None:
+        """Create an achievement that the user achieved."""
+        super().setUp()
+        self.achievement = Achievement.achievements.create_achievement(
+            title="Program",
+            description="",
+            difficulty=1,
+            achieved_by=[self.user],
+            group=self.group,
+        )
+        self.outsider = LoreUser.users.create_user(
+            "grace@example.com",
+            "Grace",
+            "Hopper",
+            "password",
+        )
+
+    def change(self, action: str, users: list) -> dict[int, str]:
+        """Award or revoke the users and return the result of each."""
+        response = self.client.post(
+            f"/api/v1/achievements/{self.achievement.pk}/achievers/{action}/",
+            {"users": users},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        return {
+            result["id"]: result["result"]
+            for result in response.json()["results"]
+        }
+
+    def test_award_and_revoke(self) -> None:
+        """Report the result for each user and keep the count."""
+        users = [self.user.pk, self.other_user.pk, self.outsider.pk]
+        self.assertEqual(
+            self.change("award", users),
+            {
+                self.user.pk: "already_achieved",
+                self.other_user.pk: "awarded",
+                self.outsider.pk: "not_member",
+            },
+        )
+        self.achievement.refresh_from_db()
+        self.assertEqual(self.achievement.num_achieved, 2)
+
+        self.assertEqual(
+            self.change("revoke", [self.user.pk, self.outsider.pk]),
+            {self.user.pk: "revoked", self.outsider.pk: "not_member"},
+        )
+        self.assertEqual(
+            self.change("revoke", [self.user.pk]),
+            {self.user.pk: "not_achieved"},
+        )
+        self.assertEqual(
+            list(self.achievement.achieved_by.values_list("pk", flat=True)),
+            [self.other_user.pk],
+        )
+
+    def test_queries(self) -> None:
+        """Award any number of users with the same queries."""
+        members = [
+            LoreUser.users.create_user(
+                f"member{i}@example.com",
+                "Member",
+                str(i),
+                "password",
+            )
+            for i in range(10)
+        ]
+        self.group.members.add(*members)
+
+        def count_queries(users: list[LoreUser]) -> int:
+            # reload the user, like for each real request
+            user = LoreUser.users.get(pk=self.user.pk)
+            self.client.force_authenticate(user)
+            with CaptureQueriesContext(connection) as queries:
+                self.change("award", [user.pk for user in users])
+            return len(queries)
+
+        self.assertEqual(count_queries(members[:1]), count_queries(members[1:]))
+        self.achievement.refresh_from_db()
+        self.assertEqual(self.achievement.num_achieved, 11)
+
+    def test_invalid(self) -> None:
+        """Reject malformed ids and achievements of other groups."""
+        url = f"/api/v1/achievements/{self.achievement.pk}/achievers/award/"
+        for users in [None, "1", [1, "2"], [True]]:
+            response = self.client.post(url, {"users": users}, format="json")
+            self.assertEqual(response.status_code, 400)
+
+        self.client.force_authenticate(self.outsider)
+        response = self.client.post(url, {"users": []}, format="json")
+        self.assertEqual(response.status_code, 404)
+
+
+class ChallengeCompletionTestCase(LoreTestCase):
+    """Checks completing a challenge and granting its achievement."""
+
+    def setUp(self) -> None:
+        """Create a challenge that both users participate in."""
+        super().setUp()
+        self.achievement = Achievement.achievements.create_achievement(
+            title="Program",
+            description="",
+            difficulty=1,
+            achieved_by=[],
+            group=self.group,
+        )
+        self.challenge = Challenge.challenges.create_challenge(
+            title="Publish",
+            description="",
+            level=1,
+            participants=[self.user, self.other_user],
+            achievement=self.achievement,
+            start_date=date(1843, 1, 1),
+            end_date=date(1843, 12, 31),
+            group=self.group,
+        )
+        self.outsider = LoreUser.users.create_user(
+            "grace@example.com",
+            "Grace",
+            "Hopper",
+            "password",
+        )
+
+    def complete(self, users: list[int]) -> dict[int, str]:
+        """Complete the challenge and return the result for each user."""
+        response = self.client.post(
+            f"/api/v1/challenges/{self.challenge.pk}/participants/complete/",
+            {"users": users},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        return {
+            result["id"]: result["result"]
+            for result in response.json()["results"]
+        }
+
+    def test_complete(self) -> None:
+        """Complete participants once and grant them the achievement."""
+        self.assertEqual(
+            self.complete([self.user.pk, self.outsider.pk]),
+            {self.user.pk: "completed", self.outsider.pk: "not_participant"},
+        )
+        self.assertEqual(
+            self.complete([self.user.pk, self.other_user.pk]),
+            {
+                self.user.pk: "already_completed",
+                self.other_user.pk: "completed",
+            },
+        )
+        self.assertEqual(
+            set(
+                self.challenge.challengeparticipant_set.values_list(
+                    "lore_user",
+                    "completed_challenge",
+                ),
+            ),
+            {(self.user.pk, True), (self.other_user.pk, True)},
+        )
+        self.achievement.refresh_from_db()
+        self.assertEqual(self.achievement.num_achieved, 2)
+
+    def test_touch(self) -> None:
+        """Mark the challenge as updated only when someone completed it."""
+        hour_ago = timezone.now() - timedelta(hours=1)
+        Challenge.challenges.update(updated=hour_ago)
+        self.challenge.complete_for_users([self.outsider.pk])
+        self.challenge.refresh_from_db()
+        self.assertEqual(self.challenge.updated, hour_ago)
+        self.challenge.complete_for_users([self.user.pk])
+        self.challenge.refresh_from_db()
+        self.assertGreater(self.challenge.updated, hour_ago)
+
+    def test_complete_for_user(self) -> None:
+        """Complete a single participant."""
+        self.challenge.complete_challenge_for_user(self.user)
+        self.assertTrue(self.achievement.has_achiever(self.user))
+        with self.assertRaises(AlreadyCompltedChallengeError):
+            self.challenge.complete_challenge_for_user(self.user)
+        with self.assertRaises(Http404):
+            self.challenge.complete_challenge_for_user(self.outsider)
+
+    def test_not_member(self) -> None:
+        """Only members of the group can complete the challenge."""
+        self.client.force_authenticate(self.outsider)
+        response = self.client.post(
+            f"/api/v1/challenges/{self.challenge.pk}/participants/complete/",
+            {"users": [self.user.pk]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class DeletionTestCase(ItemsTestCase):
+    """Checks soft deleting groups and users and purging them later."""
+
+    def purge(self) -> mock.MagicMock:
+        """Purge in small batches and return the mocked file deletion."""
+        with (
+            mock.patch.object(FileSystemStorage, "delete") as delete,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            call_command(
+                "purge_deleted",
+                "--batch-size",
+                "2",
+                stdout=StringIO(),
+            )
+        return delete
+
+    def test_delete_group(self) -> None:
+        """Hide the group right away, then delete its items and files."""
+        self.group.members.remove(self.other_user)
+        response = self.client.delete(f"/api/v1/groups/{self.group.pk}/")
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(
+            self.client.get(f"/api/v1/groups/{self.group.pk}/").status_code,
+            404,
+        )
+        response = self.client.post(
+            "/api/v1/groups/join/",
+            {"join_code": self.group.join_code},
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(Quote.quotes.filter(group=self.group).exists())
+
+        delete = self.purge()
+        self.assertFalse(LoreGroup.groups.filter(pk=self.group.pk).exists())
+        for model in [Quote, Image, Achievement, Tombstone, Activity]:
+            self.assertFalse(
+                model._default_manager.filter(group=self.group.pk).exists(),
+            )
+        self.assertEqual(
+            sorted(call.args[0] for call in delete.call_args_list),
+            [f"group_images/{i}.png" for i in range(3)],
+        )
+
+    def test_delete_user(self) -> None:
+        """Deactivate the user right away, then delete their quotes."""
+        self.client.force_authenticate(self.other_user)
+        response = self.client.delete(f"/api/v1/users/{self.other_user.pk}/")
+        self.assertEqual(response.status_code, 204)
+        self.other_user.refresh_from_db()
+        self.assertFalse(self.other_user.is_active)
+        self.assertFalse(self.group.has_member(self.other_user))
+
+        self.client.force_authenticate(self.user)
+        response = self.client.get(f"/api/v1/users/{self.other_user.pk}/")
+        self.assertEqual(response.status_code, 404)
+
+        self.group.members.add(self.other_user)
+        Quote.quotes.create_quote(
+            text="Machines think",
+            context=None,
+            said_by=self.other_user,
+            is_pinned=False,
+            group=self.group,
+        )
+        self.group.members.remove(self.other_user)
+        self.purge()
+        self.assertFalse(
+            LoreUser.users.filter(pk=self.other_user.pk).exists(),
+        )
+        self.assertEqual(Quote.quotes.filter(group=self.group).count(), 3)
+        self.assertEqual(
+            Tombstone.tombstones.filter(group=self.group).count(),
+            1,
+        )
+        self.assertEqual(
+            sorted(
+                Achievement.achievements.filter(
+                    group=self.group,
+                ).values_list("achiever_count", flat=True),
+            ),
+            [0, 1, 1],
+        )
+
+    def test_delete_files_in_bulk(self) -> None:
+        """Delete the objects of S3 storages a thousand keys at a time."""
+        storage = mock.Mock(location="media")
+        delete_files(storage, [f"{i}.png" for i in range(1500)] + [None])
+        requests = storage.bucket.delete_objects.call_args_list
+        self.assertEqual(
+            [len(call.kwargs["Delete"]["Objects"]) for call in requests],
+            [1000, 500],
+        )
+        self.assertEqual(
+            requests[0].kwargs["Delete"]["Objects"][0],
+            {"Key": "media/0.png"},
+        )
+        storage.delete.assert_not_called()
+
+
+class JobQueueTestCase(LoreTestCase):
+    """Checks enqueueing, claiming and retrying background jobs."""
+
+    def setUp(self) -> None:
+        """Register a job that records its calls."""
+        super().setUp()
+        self.calls: list[int] = []
+        self.error: Exception | None = None
+
+        def record(value: int) -> None:
+            if self.error is not None:
+                raise self.error
+            self.calls.append(value)
+
+        registry = mock.patch.dict(jobs._registry, {"record": record})
+        registry.start()
+        self.addCleanup(registry.stop)
+
+    def test_enqueue_in_transaction(self) -> None:
+        """Only keep jobs enqueued by writes that are committed."""
+        with contextlib.suppress(RuntimeError), transaction.atomic():
+            Job.jobs.enqueue("record", value=1)
+            raise RuntimeError
+        self.assertFalse(Job.jobs.exists())
+
+    def test_priority(self) -> None:
+        """Run due jobs with the highest priority first."""
+        Job.jobs.enqueue("record", value=1, priority=Job.Priority.LOW)
+        Job.jobs.enqueue("record", value=2)
+        Job.jobs.enqueue(
+            "record",
+            value=3,
+            run_at=timezone.now() + timedelta(hours=1),
+            priority=Job.Priority.HIGH,
+        )
+        Job.jobs.enqueue("record", value=4, priority=Job.Priority.HIGH)
+        call_command("run_lore_worker", "--burst", stdout=StringIO())
+        self.assertEqual(self.calls, [4, 2, 1])
+        self.assertEqual(Job.jobs.get().kwargs, {"value": 3})
+
+    def test_retry(self) -> None:
+        """Retry failed jobs later, then keep them with their error."""
+        self.error = ValueError("Broken")
+        job = Job.jobs.enqueue("record", value=1, max_attempts=2)
+        for attempts in (1, 2):
+            with self.assertLogs("lore.jobs", "ERROR"):
+                self.assertTrue(jobs.run_next_job())
+            job.refresh_from_db()
+            self.assertEqual(job.attempts, attempts)
+            self.assertIn("ValueError: Broken", job.last_error)
+            self.assertFalse(jobs.run_next_job())
+            job.run_at = timezone.now()
+            job.save()
+        self.assertIsNotNone(job.failed)
+        self.assertFalse(jobs.run_next_job())
+
+    def test_expired_leases(self) -> None:
+        """Fail jobs whose workers died on every attempt."""
+        job = Job.jobs.enqueue("record", value=1, max_attempts=2)
+        for attempts in (1, 2):
+            claimed = Job.jobs.claim(jobs.JOB_LEASE)
+            self.assertEqual(claimed.attempts, attempts)
+            self.assertIsNone(Job.jobs.claim(jobs.JOB_LEASE))
+            # the worker dies and its lease expires
+            Job.jobs.update(run_at=timezone.now())
+        self.assertIsNone(Job.jobs.claim(jobs.JOB_LEASE))
+        job.refresh_from_db()
+        self.assertIsNotNone(job.failed)
+        self.assertIn("lease", job.last_error)
+
+    def test_renew_lease(self) -> None:
+        """Extend the lease of a running job once half of it has passed."""
+        leases: list[datetime] = []
+
+        def renew() -> None:
+            for elapsed in (1, 6):
+                now = timezone.now() + timedelta(minutes=elapsed)
+                with mock.patch("lore.jobs.timezone.now", return_value=now):
+                    jobs.renew_lease()
+                leases.append(Job.jobs.get().run_at)
+
+        Job.jobs.enqueue("renew")
+        with mock.patch.dict(jobs._registry, {"renew": renew}):
+            self.assertTrue(jobs.run_next_job())
+        claimed_lease, renewed_lease = leases
+        self.assertGreater(renewed_lease, claimed_lease)
+        self.assertFalse(Job.jobs.exists())
+        # outside of a job, there is no lease to renew
+        jobs.renew_lease()
+
+    def test_worker_errors(self) -> None:
+        """Keep the worker running when it fails to reach the database."""
+        worker = "lore.management.commands.run_lore_worker"
+        with (
+            mock.patch(
+                f"{worker}.run_next_job",
+                side_effect=[OperationalError, OperationalError, True, False],
+            ) as run_next_job,
+            mock.patch(f"{worker}.close_broken_connection") as close,
+            mock.patch(f"{worker}.get_error_delay", return_value=0),
+            self.assertLogs(worker, "ERROR") as logs,
+        ):
+            call_command("run_lore_worker", "--burst", stdout=StringIO())
+        self.assertEqual(run_next_job.call_count, 4)
+        self.assertEqual(close.call_count, 2)
+        self.assertEqual(len(logs.records), 2)
+
+    def test_purge_deleted_group(self) -> None:
+        """Purge a soft deleted group in the background."""
+        self.group.members.remove(self.other_user)
+        self.client.delete(f"/api/v1/groups/{self.group.pk}/")
+        job = Job.jobs.get()
+        self.assertEqual(
+            (job.name, job.kwargs),
+            ("purge_group", {"group_id": self.group.pk}),
+        )
+        call_command("run_lore_worker", "--burst", stdout=StringIO())
+        self.assertFalse(LoreGroup.groups.filter(pk=self.group.pk).exists())
+        self.assertFalse(Job.jobs.exists())
+
+
+class JobLockingTestCase(TransactionTestCase):
+    """Checks that workers skip the jobs claimed by each other."""
+
+    def test_skip_locked(self) -> None:
+        """Claim the next job while another worker holds the first."""
+        first = Job.jobs.enqueue("record", value=1)
+        second = Job.jobs.enqueue("record", value=2)
+        other = connections.create_connection(DEFAULT_DB_ALIAS)
+        self.addCleanup(other.close)
+        other.set_autocommit(False)
+        with other.cursor() as cursor:
+            cursor.execute(
+                "SELECT id FROM lore_job WHERE id = %s FOR UPDATE",
+                [first.pk],
+            )
+            self.assertEqual(Job.jobs.claim(jobs.JOB_LEASE), second)
+            self.assertIsNone(Job.jobs.claim(jobs.JOB_LEASE))
+        other.rollback()
+        claimed = Job.jobs.claim(jobs.JOB_LEASE)
+        self.assertEqual(claimed, first)
+        self.assertEqual(claimed.attempts, 1)
+
+
+class ResponseCacheTestCase(LoreTestCase):
+    """Checks that cached pages are reused until their groups change."""
+
+    def setUp(self) -> None:
+        """Create a quote in the group."""
+        super().setUp()
+        self.quote = Quote.quotes.create_quote(
+            text="Hello",
+            context=None,
+            said_by=self.user,
+            is_pinned=False,
+            group=self.group,
+        )
+        self.url = f"/api/v1/groups/{self.group.pk}/quotes/"
+
+    def get_quotes(self) -> list[dict]:
+        """List the quotes of the group."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()["results"]
+
+    def test_cache_hit(self) -> None:
+        """Reuse the page without querying the quotes again."""
+        self.get_quotes()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.get_quotes()[0]["text"], "Hello")
+        self.assertFalse(
+            any('FROM "lore_quote"' in query["sql"] for query in queries),
+        )
+
+    def test_write(self) -> None:
+        """Invalidate the page when an item of the group is updated."""
+        self.get_quotes()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f"{self.url}{self.quote.pk}/",
+                {"text": "Goodbye"},
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get_quotes()[0]["text"], "Goodbye")
+
+    def test_membership_change(self) -> None:
+        """Invalidate the groups page when a member joins."""
+        self.assertEqual(
+            self.client.get("/api/v1/groups/").json()["results"][0][
+                "num_members"
+            ],
+            2,
+        )
+        newcomer = LoreUser.users.create_user(
+            "grace@example.com",
+            "Grace",
+            "Hopper",
+            "password",
+        )
+        self.client.force_authenticate(newcomer)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/v1/groups/join/",
+                {"join_code": self.group.join_code},
+            )
+        self.assertEqual(response.status_code, 201)
+        self.client.force_authenticate(self.user)
+        self.assertEqual(
+            self.client.get("/api/v1/groups/").json()["results"][0][
+                "num_members"
+            ],
+            3,
+        )
+
+    def test_profile_edit(self) -> None:
+        """Invalidate the pages of the user's groups when they are renamed."""
+        self.assertEqual(
+            self.get_quotes()[0]["said_by_username"],
+            "Ada Lovelace",
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f"/api/v1/users/{self.user.pk}/",
+                {"first_name": "Augusta"},
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.get_quotes()[0]["said_by_username"],
+            "Augusta Lovelace",
+        )
+
+    def test_login(self) -> None:
+        """Keep the pages when fields not shown in them are saved."""
+        self.get_quotes()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.user.last_login = timezone.now()
+            self.user.save(update_fields=["last_login"])
+        self.assertEqual(callbacks, [])
+
+
+class ETagTestCase(LoreTestCase):
+    """Checks conditional requests of group pages and items."""
+
+    def setUp(self) -> None:
+        """Create a quote in the group."""
+        super().setUp()
+        self.quote = Quote.quotes.create_quote(
+            text="Hello",
+            context=None,
+            said_by=self.user,
+            is_pinned=False,
+            group=self.group,
+        )
+        self.url = f"/api/v1/groups/{self.group.pk}/quotes/"
+
+    def get_etag(self, url: str) -> str:
+        """Request the url and return its ETag."""
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response["ETag"]
+
+    def assert_changed(self, url: str, etag: str) -> str:
+        """Assert the url no longer matches the ETag and return the new one."""
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        return response["ETag"]
+
+    def test_not_modified(self) -> None:
+        """Answer with a 304 for a matching If-None-Match."""
+        for url in (self.url, f"{self.url}{self.quote.pk}/"):
+            etag = self.get_etag(url)
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response["ETag"], etag)
+            self.assertFalse(response.content)
+
+    def test_writes(self) -> None:
+        """Change the ETag after a create, an update and a delete."""
+        etag = self.get_etag(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                self.url,
+                {"text": "Goodbye", "said_by": self.user.pk, "pinned": False},
+            )
+        self.assertEqual(response.status_code, 201)
+        etag = self.assert_changed(self.url, etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f"{self.url}{self.quote.pk}/",
+                {"pinned": True},
+            )
+        self.assertEqual(response.status_code, 200)
+        etag = self.assert_changed(self.url, etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f"{self.url}{self.quote.pk}/")
+        self.assertEqual(response.status_code, 204)
+        self.assert_changed(self.url, etag)
+
+    def test_profile_edit(self) -> None:
+        """Change the ETag after a member edits their profile."""
+        etag = self.get_etag(self.url)
+        self.client.force_authenticate(self.other_user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f"/api/v1/users/{self.other_user.pk}/",
+                {"last_name": "Mathison Turing"},
+            )
+        self.assertEqual(response.status_code, 200)
+        self.client.force_authenticate(self.user)
+        self.assert_changed(self.url, etag)
+
+    def test_per_user(self) -> None:
+        """Tag the same page differently for each user."""
+        etag = self.get_etag(self.url)
+        self.client.force_authenticate(self.other_user)
+        self.assert_changed(self.url, etag)
+
+
+class SyncTestCase(LoreTestCase):
+    """Checks syncing the items of a group changed since a token."""
+
+    def setUp(self) -> None:
+        """Create quotes last updated an hour ago."""
+        super().setUp()
+        self.url = f"/api/v1/groups/{self.group.pk}/sync/"
+        self.quotes = [
+            Quote.quotes.create_quote(
+                text=f"Quote {i}",
+                context=None,
+                said_by=[self.user, self.other_user][i % 2],
+                is_pinned=False,
+                group=self.group,
+            )
+            for i in range(3)
+        ]
+        self.hour_ago = timezone.now() - timedelta(hours=1)
+        Quote.quotes.update(updated=self.hour_ago)
+
+    def sync(self, token: str | None = None) -> dict:
+        """Sync the group, since the token if one is given."""
+        params = {"since": token} if token else {}
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return json.loads(b"".join(response.streaming_content))
+
+    def test_first_sync(self) -> None:
+        """Return every item of the group and a token."""
+        data = self.sync()
+        self.assertEqual(
+            [quote["id"] for quote in data["quotes"]],
+            [quote.pk for quote in self.quotes],
+        )
+        self.assertEqual(data["images"], [])
+        self.assertEqual(data["deleted"], [])
+        self.assertGreater(
+            decode_sync_token(data["token"]),
+            self.hour_ago,
+        )
+
+    def test_since(self) -> None:
+        """Return the items created, updated or deleted after the token."""
+        token = encode_sync_token(self.hour_ago + timedelta(minutes=30))
+        updated, deleted, _ = self.quotes
+        deleted_pk = deleted.pk
+        updated.text = "Updated"
+        updated.save()
+        deleted.delete()
+        created = Quote.quotes.create_quote(
+            text="Created",
+            context=None,
+            said_by=self.user,
+            is_pinned=False,
+            group=self.group,
+        )
+        data = self.sync(token)
+        self.assertEqual(
+            [quote["text"] for quote in data["quotes"]],
+            ["Updated", "Created"],
+        )
+        self.assertEqual(data["quotes"][1]["id"], created.pk)
+        self.assertEqual(
+            data["deleted"],
+            [{"type": "quote", "id": deleted_pk}],
+        )
+
+        later = encode_sync_token(timezone.now() + timedelta(minutes=1))
+        data = self.sync(later)
+        self.assertEqual((data["quotes"], data["deleted"]), ([], []))
+
+    def test_cascade_tombstones(self) -> None:
+        """Record the items deleted along with their user."""
+        self.other_user.delete()
+        self.assertEqual(
+            self.sync()["deleted"],
+            [{"type": "quote", "id": self.quotes[1].pk}],
+        )
+
+    def test_group_delete_tombstones(self) -> None:
+        """Skip the tombstones of items deleted along with their group."""
+        with mock.patch.object(
+            Tombstone.tombstones,
+            "record",
+        ) as record:
+            self.group.delete()
+        record.assert_not_called()
+
+    def test_invalid_token(self) -> None:
+        """Reject a malformed token, or one without a time zone."""
+        naive = base64.urlsafe_b64encode(b"1843-01-01T00:00:00").decode()
+        for token in ("not base64!", "bm90IGEgZGF0ZQ==", naive):
+            with self.subTest(token=token):
+                response = self.client.get(self.url, {"since": token})
+                self.assertEqual(response.status_code, 400)
+
+    def test_backfill_updated(self) -> None:
+        """Treat existing items as last updated when they were created."""
+        migration = importlib.import_module(
+            "lore.migrations.0029_groupitem_updated_tombstone",
+        )
+        migration.set_updated_to_created(django_apps, None)
+        for quote in Quote.quotes.all():
+            self.assertEqual(quote.updated, quote.created)
+
+
+class LinkParityTestCase(ItemsTestCase):
+    """Checks that url templates render the same urls as `reverse`."""
+
+    def setUp(self) -> None:
+        """Add a challenge the user participates in."""
+        super().setUp()
+        Challenge.challenges.create_challenge(
+            title="Publish",
+            description="",
+            level=1,
+            participants=[self.user],
+            achievement=Achievement.achievements.first(),
+            start_date=date(1843, 1, 1),
+            end_date=date(1843, 12, 31),
+            group=self.group,
+        )
+        self.addCleanup(set_script_prefix, "/")
+        self.factory = APIRequestFactory()
+
+    def reversing(self) -> contextlib.ExitStack:
+        """Replace the url templates with DRF's reversed hyperlinks."""
+        stack = contextlib.ExitStack()
+        stack.enter_context(
+            mock.patch.object(
+                TemplateHyperlinkedRelatedField,
+                "get_url",
+                HyperlinkedRelatedField.get_url,
+            ),
+        )
+        for module in ("lore.serializers", "lore.views.feed"):
+            stack.enter_context(mock.patch(f"{module}.build_url", reverse_url))
+        return stack
+
+    def render(self, request: Request) -> bytes:
+        """Render an instance of every hyperlinked serializer."""
+        context = {"request": request}
+        data = [
+            serializer_class(instance, context=context).data
+            for serializer_class, instance in [
+                (serializers.UserSerializer, self.user),
+                (serializers.QuoteSerializer, Quote.quotes.first()),
+                (serializers.ImageSerializer, Image.images.first()),
+                (serializers.GroupSerializer, self.group),
+                (serializers.ChallengeSerializer, Challenge.challenges.get()),
+            ]
+        ]
+        data.extend(
+            serializers.AchievementSerializer(
+                Achievement.achievements.all(),
+                many=True,
+                context=context,
+            ).data,
+        )
+        return JSONRenderer().render(data)
+
+    def test_serializers(self) -> None:
+        """Render identical JSON with either kind of hyperlink."""
+        for path, script_prefix, extra in [
+            ("/api/v1/quotes/", "/", {}),
+            ("/api/v1/quotes/?page=2&search=a%20b", "/", {}),
+            (
+                "/api/v1/quotes/",
+                "/",
+                {"HTTP_HOST": "lore.example.org:8443", "secure": True},
+            ),
+            ("/lore/api/v1/quotes/", "/lore/", {"SCRIPT_NAME": "/lore"}),
+        ]:
+            with self.subTest(path=path, extra=extra):
+                set_script_prefix(script_prefix)
+                request = Request(self.factory.get(path, **extra))
+                request.user = self.user
+                templated = self.render(request)
+                with self.reversing():
+                    reversed_ = self.render(request)
+                self.assertIn(b"logged_in_user_url", templated)
+                self.assertEqual(templated, reversed_)
+
+    def test_feed(self) -> None:
+        """Render the feed's item urls like `reverse`."""
+        templated = self.client.get("/api/v1/feed/")
+        cache.clear()
+        with self.reversing():
+            reversed_ = self.client.get("/api/v1/feed/")
+        self.assertEqual(templated.status_code, 200)
+        self.assertEqual(templated.content, reversed_.content)
+
+
+@mock.patch.object(views.FeedView, "page_size", 2)
+class FeedCursorTestCase(LoreTestCase):
+    """Checks keyset pagination of the feed."""
+
+    def setUp(self) -> None:
+        """Create quotes and images that were all created at once."""
+        super().setUp()
+        for i in range(3):
+            Quote.quotes.create_quote(
+                text=f"Quote {i}",
+                context=None,
+                said_by=self.user,
+                is_pinned=False,
+                group=self.group,
+            )
+            image = Image(image=f"group_images/{i}.png", group=self.group)
+            image.save()
+            Activity.activities.record(image)
+        Activity.activities.update(created=datetime(1843, 1, 1, tzinfo=UTC))
+
+    def test_identical_timestamps(self) -> None:
+        """Return every item once across the pages."""
+        url: str | None = "/api/v1/feed/?cursor="
+        seen: list[tuple[str, str]] = []
+        pages = 0
+        while url is not None:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            seen.extend(
+                (item["type"], item["url"]) for item in data["results"]
+            )
+            url = data["next"]
+            pages += 1
+        self.assertEqual(pages, 3)
+        self.assertEqual(len(seen), 6)
+        self.assertEqual(len(set(seen)), 6)
+
+    def test_invalid_cursor(self) -> None:
+        """Reject malformed and tampered cursors."""
+        for raw in (
+            "not a cursor",
+            "1843-01-01T00:00:00+00:00|quote",
+            "1843-01-01T00:00:00+00:00|quote|one",
+            "1843-01-01T00:00:00|quote|1",
+            "1843-01-01T00:00:00+00:00|quo\x00te|1",
+        ):
+            cursor = base64.urlsafe_b64encode(raw.encode()).decode()
+            for value in (cursor, "%%%"):
+                with self.subTest(raw=raw, value=value):
+                    response = self.client.get(
+                        "/api/v1/feed/",
+                        {"cursor": value},
+                    )
+                    self.assertEqual(response.status_code, 400)
+
+
+class ActivityTestCase(LoreTestCase):
+    """Checks that group items are added to the feed."""
+
+    def create_items(self) -> list[GroupItem]:
+        """Create an item of every type with its manager."""
+        quote = Quote.quotes.create_quote(
+            text="Hello",
+            context=None,
+            said_by=self.user,
+            is_pinned=False,
+            group=self.group,
+        )
+        # a file name skips the upload to the storage
+        image = Image.images.create_image(
+            image="group_images/engine.png",
+            description=None,
+            group=self.group,
+        )
+        achievement = Achievement.achievements.create_achievement(
+            title="Program",
+            description="",
+            difficulty=1,
+            achieved_by=[],
+            group=self.group,
+        )
+        challenge = Challenge.challenges.create_challenge(
+            title="Publish",
+            description="",
+            level=1,
+            participants=[],
+            achievement=achievement,
+            start_date=date(1843, 1, 1),
+            end_date=date(1843, 12, 31),
+            group=self.group,
+        )
+        return [quote, image, achievement, challenge]
+
+    def test_record(self) -> None:
+        """Record an activity for each created item."""
+        items = self.create_items()
+        for item in items:
+            activity = Activity.activities.get(
+                **{item._meta.model_name: item},
+            )
+            self.assertEqual(activity.type, item._meta.model_name)
+            self.assertEqual(activity.group_id, self.group.pk)
+            self.assertEqual(activity.created, item.created)
+
+    def backfill(self) -> str:
+        """Run the backfill and return its output."""
+        stdout = StringIO()
+        call_command(
+            "backfill_activities",
+            "--batch-size",
+            "2",
+            stdout=stdout,
+        )
+        return stdout.getvalue()
+
+    def test_backfill(self) -> None:
+        """Create the missing activities once, and only count those."""
+        self.create_items()
+        self.create_items()
+        Activity.activities.filter(
+            type__in=[Activity.Type.QUOTE, Activity.Type.ACHIEVEMENT],
+        ).delete()
+        self.assertIn("Created 2 quote activities", self.backfill())
+        self.assertEqual(Activity.activities.count(), 8)
+        output = self.backfill()
+        self.assertEqual(output.count("Created 0 "), 4)
+        self.assertEqual(Activity.activities.count(), 8)
+
+    def test_backfill_skips_existing(self) -> None:
+        """Do not count items that gained an activity during the backfill."""
+        quote = self.create_items()[0]
+        Activity.activities.filter(quote=quote).delete()
+
+        def read_then_record(items: Iterable, size: int) -> Iterator:
+            for batch in itertools.batched(items, size):
+                # the quote gains its activity after the backfill read it
+                Activity.activities.get_or_create(
+                    quote=quote,
+                    defaults={
+                        "group": self.group,
+                        "type": Activity.Type.QUOTE,
+                        "created": quote.created,
+                    },
+                )
+                yield batch
+
+        with mock.patch(
+            "lore.management.commands.backfill_activities.batched",
+            read_then_record,
+        ):
+            self.assertIn("Created 0 quote activities", self.backfill())
+        self.assertEqual(Activity.activities.filter(quote=quote).count(), 1)
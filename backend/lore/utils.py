@@ -51,6 +51,6 @@ class GroupMemberItemPermission(permissions.BasePermission):
         user: LoreUser = cast(LoreUser, request.user)
         group_pk = view.kwargs.get(
             "loregroup_pk",
-            view.kwargs.get("group_id", obj.group.id),
+            view.kwargs.get("group_id", obj.group_id),
         )
         return user.is_in_group(group_pk)
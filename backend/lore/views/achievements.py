@@ -3,6 +3,7 @@
 from typing import Any, ClassVar, cast
 
 from dj_rest_auth.views import IsAuthenticated
+from django.db.models import Prefetch
 from django.http import HttpRequest
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, permissions, viewsets
@@ -11,11 +12,18 @@ from rest_framework.exceptions import ParseError
 from rest_framework.serializers import BaseSerializer
 
 from lore import serializers
+from lore.cache import GroupCacheMixin
+from lore.fieldsets import is_field_requested
 from lore.models import Achievement, LoreGroup, LoreUser
+from lore.rows import AchievementRowSerializer, RowListMixin
 from lore.utils import GroupMemberItemPermission
 
 
-class AchievementViewSet(viewsets.ModelViewSet):
+class AchievementViewSet(
+    GroupCacheMixin,
+    RowListMixin,
+    viewsets.ModelViewSet,
+):
     """Viewset for achievements.
 
     Supports filtering by group_id and searching by description and title
@@ -26,6 +34,7 @@ class AchievementViewSet(viewsets.ModelViewSet):
     """
 
     serializer_class = serializers.AchievementSerializer
+    row_serializer_class = AchievementRowSerializer
     permission_classes: ClassVar[list[type[permissions.BasePermission]]] = [
         IsAuthenticated,
         GroupMemberItemPermission,
@@ -50,7 +59,16 @@ class AchievementViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Get all achievements that the user completed or all the achievements in the group. """
         user: LoreUser = cast(LoreUser, self.request.user)
-        queryset = Achievement.achievements
+        queryset = Achievement.achievements.all()
+        if is_field_requested(self.request, "logged_in_user_url"):
+            queryset = Achievement.achievements.with_achieved_by_user(user)
+        if is_field_requested(self.request, "achieved_by"):
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "achieved_by",
+                    queryset=LoreUser.users.only("pk").order_by("pk"),
+                ),
+            )
         if self.kwargs.get("loregroup_pk") is not None:
             queryset = queryset.filter(
                 group_id=self.kwargs["loregroup_pk"],
@@ -19,16 +19,19 @@ from rest_framework.status import (
 from rest_framework.views import Request, Response
 
 from lore import serializers
+from lore.cache import GroupCacheMixin
+from lore.fieldsets import is_field_requested
 from lore.models import Challenge, ChallengeParticipant, LoreGroup, LoreUser
 from lore.utils import GroupMemberItemPermission
 from lore.views.users import (
     BaseLoreUserViewSet,
     MutualPermission,
     create_is_owner_permission,
+    get_batch_user_ids,
 )
 
 
-class ChallengeViewSet(viewsets.ModelViewSet):
+class ChallengeViewSet(GroupCacheMixin, viewsets.ModelViewSet):
     """Viewset for challnges."""
 
     serializer_class = serializers.ChallengeSerializer
@@ -65,6 +68,10 @@ class ChallengeViewSet(viewsets.ModelViewSet):
             user_groups = LoreGroup.groups.get_groups_with_user(user)
             queryset = queryset.filter(group__in=user_groups)
 
+        if is_field_requested(self.request, "achievement"):
+            queryset = queryset.select_related("achievement").prefetch_related(
+                "achievement__achieved_by",
+            )
         return queryset.order_by("pk")
 
     def perform_create(
@@ -104,10 +111,39 @@ class ChallengeParticipantsViewSet(viewsets.ModelViewSet):
         return queryset
 
     def get_serializer_class(self) -> type[BaseSerializer]:
-        if self.action in ["create", "delete"]:
+        if self.action in ["create", "delete", "complete"]:
             return Serializer
         return self.serializer_class
 
+    @action(detail=False, methods=["post"])
+    def complete(self, request: Request, challenge_pk: int) -> Response:
+        """Mark many participants as having completed the challenge.
+
+        Expects the ids of the users in `users`, and grants the challenge's
+        achievement to the participants that completed it. Returns the
+        result for each user: `completed`, `already_completed` or
+        `not_participant`.
+        Only members of the challenge's group can complete it.
+        """
+        user_ids = get_batch_user_ids(request)
+        user = cast("LoreUser", request.user)
+        challenge = Challenge.challenges.filter(pk=challenge_pk).first()
+        if challenge is None or not user.is_in_group(challenge.group_id):
+            return Response(
+                {"message": "Challenge does not exist"},
+                status=HTTP_404_NOT_FOUND,
+            )
+
+        results = challenge.complete_for_users(user_ids)
+        return Response(
+            {
+                "results": [
+                    {"id": pk, "result": result}
+                    for pk, result in results.items()
+                ],
+            },
+        )
+
     def create(self, request: Request, challenge_pk: int) -> Response:
         """Add or delete the authenticated user to the list of participants.
 
@@ -3,18 +3,28 @@
 from typing import Any, ClassVar, cast
 
 from dj_rest_auth.views import IsAuthenticated
-from django.db.models import CharField, F, Model, QuerySet, Value
+from django.db.models import F, Q, QuerySet
 from django.http import HttpRequest
-from django.urls import reverse
 from rest_framework import status
 from rest_framework import permissions
 from rest_framework.exceptions import ParseError
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import BasePermission
+from rest_framework.serializers import BaseSerializer
 from rest_framework.views import APIView, Response, View
 
-from lore.models import Image, LoreGroup, LoreUser, Quote
-from lore.views import groups
+from lore import serializers
+from lore.cache import get_cached_response, get_user_group_ids
+from lore.links import build_url
+from lore.models import (
+    Achievement,
+    Activity,
+    Challenge,
+    Image,
+    LoreUser,
+    Quote,
+)
+from lore.pagination import FeedCursor, get_cursor_link
 
 
 class GroupMemberPermission(permissions.BasePermission):
@@ -45,10 +55,20 @@ class FeedView(APIView, PageNumberPagination):
     """Display info about recent events.
 
     Supports the GET path, which retrieves a list of data ordered by timestamp.
+    The events are read from the groups' activities.
     This list rreturns urls and types, so the requester must retrieve the items
     involved in the events themselves.
+
+    Passing a `cursor` query parameter (empty for the first page) switches to
+    keyset pagination, which only loads the requested page from the database.
+
+    Passing `expand=1` embeds the serialized item of each event under `item`.
+    The items of a page are loaded with one query per type.
     """
 
+    cursor_query_param = "cursor"
+    expand_query_param = "expand"
+
     permission_classes: ClassVar[list[type[BasePermission]]] = [
         IsAuthenticated,
         GroupMemberPermission,
@@ -62,49 +82,27 @@ class FeedView(APIView, PageNumberPagination):
         """
         user = cast(LoreUser, request.user)
 
-        user_groups: QuerySet[LoreGroup, LoreGroup] | None = None
         group_id = request.GET.get("group_id")
         if group_id is None:
-            user_groups = LoreGroup.groups.get_groups_with_user(user).all()
+            group_ids = get_user_group_ids(user)
         else:
-            user_groups = LoreGroup.groups.filter(pk=group_id)
-
-        quotes = Quote.quotes.filter(group__in=user_groups)
-        images = Image.images.filter(group__in=user_groups)
-
-        def annotate_type(
-            queryset: QuerySet[Model, Model],
-            type_name: str,
-        ) -> QuerySet[Model, Model]:
-            """Annotate the object with an extra 'type' column."""
-            return queryset.annotate(
-                type=Value(type_name, output_field=CharField()),
-            )
+            group_ids = [int(group_id)]
 
-        # get item ids ordered by descending timestamp
-        # adds an additional type field
-        item_ordering = list(
-            annotate_type(quotes, "quote")
-            .annotate(timestamp=F("created"))
-            .union(
-                annotate_type(images, "image").annotate(
-                    timestamp=F("created"),
-                ),
-            )
-            .values("id", "type", "timestamp")
-            .order_by("-timestamp"),
+        return get_cached_response(
+            request,
+            group_ids,
+            lambda: self.get_feed(request, group_ids),
         )
 
-        def update_item(item: dict[str, Any]) -> dict[str, Any]:
-            """Attach the item's url and remove the id field."""
-            item["url"] = request.build_absolute_uri(
-                reverse(
-                    f"{item['type']}-detail",
-                    kwargs={"pk": item["id"]},
-                ),
-            )
-            del item["id"]
-            return item
+    def get_feed(self, request: HttpRequest, group_ids: list[int]) -> Response:
+        """Retrieve the page of the feed of the given groups."""
+        if self.cursor_query_param in request.GET:
+            return self.get_cursor_page(request, group_ids)
+
+        activities = Activity.activities.get_group_activities(group_ids)
+
+        # get item ids ordered by descending timestamp
+        item_ordering = select_items(activities).order_by("-timestamp")
 
         paginated_item_ordering: list[Any] | None = self.paginate_queryset(
             item_ordering,
@@ -117,5 +115,171 @@ class FeedView(APIView, PageNumberPagination):
                 status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
-        linked_items = [update_item(item) for item in paginated_item_ordering]
-        return self.get_paginated_response(linked_items)
+        return self.get_paginated_response(
+            self.link_items(request, paginated_item_ordering),
+        )
+
+    def get_cursor_page(
+        self,
+        request: HttpRequest,
+        group_ids: list[int],
+    ) -> Response:
+        """Retrieve the page of the feed that follows the cursor.
+
+        Only the activities past the cursor are read, through the group and
+        created index, so a page costs the same no matter how large the feed
+        is.
+        """
+        encoded_cursor = request.GET.get(self.cursor_query_param)
+        cursor = FeedCursor.decode(encoded_cursor) if encoded_cursor else None
+        limit = self.get_page_size(request) + 1
+
+        items = select_cursor_page(group_ids, cursor, limit)
+
+        next_cursor = None
+        if len(items) == limit:
+            del items[-1]
+            last = items[-1]
+            next_cursor = FeedCursor(
+                last["timestamp"],
+                last["type"],
+                last["object_id"],
+            )
+
+        return Response(
+            {
+                "next": get_cursor_link(
+                    request,
+                    self.cursor_query_param,
+                    next_cursor,
+                ),
+                "previous": None,
+                "results": self.link_items(request, items),
+            },
+        )
+
+    def link_items(
+        self,
+        request: HttpRequest,
+        items: list[dict[str, Any]],
+    ) -> list[dict[str, Any]]:
+        """Attach the url of each item, and the item itself if expanded."""
+        if request.GET.get(self.expand_query_param) not in ["1", "true"]:
+            return [link_item(request, item) for item in items]
+
+        expanded = expand_items(request, items)
+        linked_items = []
+        for item in items:
+            obj = expanded[item["type"]].get(item["object_id"])
+            linked_items.append({**link_item(request, item), "item": obj})
+        return linked_items
+
+
+def select_items(
+    activities: QuerySet[Activity, Activity],
+) -> QuerySet[Activity, dict[str, Any]]:
+    """Select the type, timestamp and object id of the activities."""
+    return activities.values("type", "object_id", timestamp=F("created"))
+
+
+def after_cursor(cursor: FeedCursor) -> Q:
+    """Filter activities that come after the cursor.
+
+    The feed is ordered by descending (created, type, object id). The
+    leading bound on the creation time lets the database start its index
+    scan at the cursor.
+    """
+    return Q(created__lte=cursor.created) & (
+        Q(created__lt=cursor.created)
+        | Q(created=cursor.created, type__lt=cursor.type)
+        | Q(created=cursor.created, type=cursor.type, object_id__lt=cursor.id)
+    )
+
+
+def select_cursor_page(
+    group_ids: list[int],
+    cursor: FeedCursor | None,
+    limit: int,
+) -> list[dict[str, Any]]:
+    """Select the items of the groups' feed that follow the cursor.
+
+    Each group's page is read from its own range of the group and created
+    index, and the pages are merged in the database, so no more than the
+    limit of items is read per group.
+    """
+    ordering = ["-timestamp", "-type", "-object_id"]
+    pages = []
+    for group_id in group_ids:
+        activities = Activity.activities.get_group_activities([group_id])
+        if cursor is not None:
+            activities = activities.filter(after_cursor(cursor))
+        pages.append(select_items(activities).order_by(*ordering)[:limit])
+    if not pages:
+        return []
+    if len(pages) == 1:
+        return list(pages[0])
+    merged = pages[0].union(*pages[1:], all=True)
+    return list(merged.order_by(*ordering)[:limit])
+
+
+def get_group_item_types() -> dict[
+    str,
+    tuple[QuerySet[Any, Any], type[BaseSerializer]],
+]:
+    """Get the queryset and serializer of each type of group item.
+
+    The querysets load the relations their serializer reads, so serializing
+    a page of items takes a fixed number of queries.
+    """
+    return {
+        Activity.Type.QUOTE: (
+            Quote.quotes.select_related("said_by"),
+            serializers.QuoteSerializer,
+        ),
+        Activity.Type.IMAGE: (
+            Image.images.all(),
+            serializers.ImageSerializer,
+        ),
+        Activity.Type.ACHIEVEMENT: (
+            Achievement.achievements.prefetch_related("achieved_by"),
+            serializers.AchievementSerializer,
+        ),
+        Activity.Type.CHALLENGE: (
+            Challenge.challenges.select_related("achievement").prefetch_related(
+                "participants",
+                "achievement__achieved_by",
+            ),
+            serializers.ChallengeSerializer,
+        ),
+    }
+
+
+def expand_items(
+    request: HttpRequest,
+    items: list[dict[str, Any]],
+) -> dict[str, dict[int, dict[str, Any]]]:
+    """Serialize the objects of the items, keyed by type and then id."""
+    expanded: dict[str, dict[int, dict[str, Any]]] = {}
+    item_types = get_group_item_types()
+    for type_name, (queryset, serializer_class) in item_types.items():
+        ids = [item["object_id"] for item in items if item["type"] == type_name]
+        expanded[type_name] = {}
+        if not ids:
+            continue
+        serializer = serializer_class(
+            queryset.filter(pk__in=ids),
+            many=True,
+            context={"request": request},
+        )
+        expanded[type_name] = {data["id"]: data for data in serializer.data}
+    return expanded
+
+
+def link_item(request: HttpRequest, item: dict[str, Any]) -> dict[str, Any]:
+    """Attach the item's url and remove the object id field."""
+    item["url"] = build_url(
+        request,
+        f"{item['type']}-detail",
+        pk=item.pop("object_id"),
+    )
+    return item
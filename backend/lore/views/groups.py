@@ -1,9 +1,14 @@
 """The view for the groups."""
 
+import itertools
+from collections.abc import Iterator
+from datetime import timedelta
 from typing import Any, ClassVar, cast
 
-from django.http import Http404, HttpRequest
-from rest_framework import filters, mixins, permissions, viewsets
+from django.db.models import QuerySet
+from django.http import Http404, HttpRequest, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import mixins, permissions, viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import ParseError
 from rest_framework.serializers import BaseSerializer
@@ -16,6 +21,32 @@ from rest_framework.status import (
 from rest_framework.views import Response
 
 from lore import models, serializers
+from lore.cache import GroupCacheMixin
+from lore.pagination import decode_sync_token, encode_sync_token
+from lore.renderers import StreamedList, get_streaming_response
+from lore.search import TrigramSearchFilter
+from lore.views.feed import get_group_item_types
+
+# Writes that commit after a sync started may carry an earlier timestamp,
+# so each sync token overlaps the previous sync by this much.
+SYNC_OVERLAP = timedelta(seconds=5)
+# Number of items of a sync that are serialized and sent at a time.
+SYNC_CHUNK_SIZE = 500
+
+
+def serialize_chunks(
+    request: HttpRequest,
+    queryset: QuerySet,
+    serializer_class: type[BaseSerializer],
+) -> Iterator[list[Any]]:
+    """Serialize the items of the queryset a chunk at a time."""
+    items = queryset.iterator(chunk_size=SYNC_CHUNK_SIZE)
+    for chunk in itertools.batched(items, SYNC_CHUNK_SIZE):
+        yield serializer_class(
+            chunk,
+            many=True,
+            context={"request": request},
+        ).data
 
 
 class GroupMemberPermission(permissions.BasePermission):
@@ -79,7 +110,7 @@ from drf_spectacular.utils import extend_schema_view, extend_schema, OpenApiPara
         ]
     ),
 )
-class GroupViewSet(viewsets.ModelViewSet):
+class GroupViewSet(GroupCacheMixin, viewsets.ModelViewSet):
     """Queryset for groups."""
 
     serializer_class = serializers.GroupSerializer
@@ -88,7 +119,7 @@ class GroupViewSet(viewsets.ModelViewSet):
         GroupMemberPermission,
     ]
     filter_backends: ClassVar[list[type[Any]]] = [
-        filters.SearchFilter,
+        TrigramSearchFilter,
     ]
     search_fields: ClassVar[list[str]] = ["name"]
 
@@ -107,26 +138,35 @@ class GroupViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """List all groups that the user is in."""
         user: models.LoreUser = cast(models.LoreUser, self.request.user)
-        return models.LoreGroup.groups.get_groups_with_user(user).order_by(
-            "pk",
-        )
+        return models.LoreGroup.groups.filter(members=user).order_by("pk")
+
+    def get_object_group_id(self, obj: models.LoreGroup) -> int:
+        """Get the id of the group, which is the object itself."""
+        return obj.pk
 
     def destroy(self, _: HttpRequest, pk: int | None = None) -> Response:
-        """Destroy the group if it exists and there is at most 1 member."""
+        """Destroy the group if it exists and there is at most 1 member.
+
+        The group is soft deleted, which hides it right away, and its items
+        are deleted in the background.
+        """
         group: models.LoreGroup | None = cast(
             "models.LoreGroup | None",
-            models.LoreGroup.groups.filter(pk=pk).first(),
+            models.LoreGroup.groups.filter(
+                pk=pk,
+                deleted__isnull=True,
+            ).first(),
         )
         if group is None:
             msg = "Group does not exist"
             raise Http404(msg)
-        num_members = group.members.count()
+        num_members = group.num_members
         if num_members > 1:
             return Response(
                 status=HTTP_401_UNAUTHORIZED,
                 data="Cannot delete the group as there is more than 1 member",
             )
-        group.delete()
+        group.soft_delete()
 
         return Response(status=HTTP_204_NO_CONTENT)
 
@@ -160,3 +200,52 @@ class GroupViewSet(viewsets.ModelViewSet):
         context = {"request": request}
         serializer = self.serializer_class(group, many=False, context=context)
         return Response(serializer.data, status=HTTP_201_CREATED)
+
+    @action(detail=True, methods=["get"])
+    def sync(
+        self,
+        request: HttpRequest,
+        pk: int | None = None,
+    ) -> StreamingHttpResponse | Response:
+        """Retrieve the group's items that changed since the last sync.
+
+        Expects the token returned by the previous sync in the `since` query
+        parameter. Returns the created or updated items of each type, the
+        type and id of each deleted item, and the token for the next sync.
+        Without a token, every item of the group is returned.
+        Items changed right before the token may be returned again.
+
+        JSON responses are streamed, since a first sync holds every item.
+        """
+        group = self.get_object()
+        token = request.GET.get("since")
+        since = decode_sync_token(token) if token else None
+        data: dict[str, Any] = {
+            "token": encode_sync_token(timezone.now() - SYNC_OVERLAP),
+        }
+
+        item_types = get_group_item_types()
+        for type_name, (queryset, serializer_class) in item_types.items():
+            items = queryset.filter(group=group)
+            if since is not None:
+                items = items.filter(updated__gt=since)
+            data[f"{type_name}s"] = StreamedList(
+                serialize_chunks(
+                    request,
+                    items.order_by("pk"),
+                    serializer_class,
+                ),
+            )
+
+        tombstones = models.Tombstone.tombstones.filter(group=group)
+        if since is not None:
+            tombstones = tombstones.filter(deleted__gt=since)
+        data["deleted"] = [
+            {"type": type_name, "id": object_id}
+            for type_name, object_id in tombstones.values_list(
+                "type",
+                "object_id",
+            )
+        ]
+
+        return get_streaming_response(request, data)
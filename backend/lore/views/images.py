@@ -8,11 +8,13 @@ from rest_framework import filters, permissions, viewsets
 from rest_framework.exceptions import ParseError
 
 from lore import serializers
+from lore.cache import GroupCacheMixin
 from lore.models import Image, LoreGroup, LoreUser
+from lore.rows import ImageRowSerializer, RowListMixin
 from lore.utils import GroupMemberItemPermission
 
 
-class ImageViewSet(viewsets.ModelViewSet):
+class ImageViewSet(GroupCacheMixin, RowListMixin, viewsets.ModelViewSet):
     """Viewset for quotes.
 
     Supports filtering by group_id and searching by description
@@ -23,6 +25,7 @@ class ImageViewSet(viewsets.ModelViewSet):
     """
 
     serializer_class = serializers.ImageSerializer
+    row_serializer_class = ImageRowSerializer
     permission_classes: ClassVar[list[type[permissions.BasePermission]]] = [
         IsAuthenticated,
         GroupMemberItemPermission,
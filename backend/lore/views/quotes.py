@@ -3,19 +3,29 @@
 from typing import Any, ClassVar, cast
 
 from dj_rest_auth.views import IsAuthenticated
-from django.http import HttpRequest
+from django.http import Http404, HttpRequest, StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, permissions, viewsets
+from rest_framework import permissions, viewsets
+from rest_framework.decorators import action
 from rest_framework.exceptions import ParseError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.request import Request
 
 from lore import serializers
+from lore.cache import GroupCacheMixin
+from lore.fieldsets import is_field_requested
+from lore.imports import IMPORT_FORMATS, import_quotes
 from lore.models import LoreGroup, LoreUser, Quote
+from lore.renderers import dumps, stream_response
+from lore.rows import QuoteRowSerializer, RowListMixin
+from lore.search import FullTextSearchFilter
 from lore.utils import GroupMemberItemPermission, GroupMemberRoutePermissions
 
-class BaseQuoteViewSet(viewsets.ModelViewSet):
+class BaseQuoteViewSet(GroupCacheMixin, RowListMixin, viewsets.ModelViewSet):
     """Viewset for quotes.
 
-    Supports filtering by group_id and said_by_id, and also searching by text
+    Supports filtering by group_id and said_by_id, and also a ranked full
+    text search of the text and context.
     Quotes can only be created when querying by a specific group.
 
     To create a quote, it expects a `text` and `said_by` field. The group
@@ -23,19 +33,19 @@ class BaseQuoteViewSet(viewsets.ModelViewSet):
     """
 
     serializer_class = serializers.QuoteSerializer
+    row_serializer_class = QuoteRowSerializer
     permission_classes: ClassVar[list[type[permissions.BasePermission]]] = [
         IsAuthenticated,
         GroupMemberItemPermission,
     ]
     filter_backends: ClassVar[list[type[Any]]] = [
-        filters.SearchFilter,
+        FullTextSearchFilter,
         DjangoFilterBackend,
     ]
     filterset_fields: ClassVar[list[str]] = [
         "said_by_id",
         "pinned",
     ]
-    search_fields: ClassVar[list[str]] = ["text", "context"]
 
     def perform_create(self, serializer: serializers.QuoteSerializer) -> None:
         """Create the item in the database."""
@@ -62,6 +72,8 @@ class AllUserGroupsQuoteViewSet(BaseQuoteViewSet):
         user_groups = LoreGroup.groups.get_groups_with_user(user)
         queryset = queryset.filter(group__in=user_groups, said_by=user)
 
+        if is_field_requested(self.request, "said_by_username"):
+            queryset = queryset.select_related("said_by")
         return queryset.order_by("pk")
 
 
@@ -85,4 +97,44 @@ class GroupQuoteViewSet(BaseQuoteViewSet):
             group_id=self.kwargs["loregroup_pk"],
         )
 
+        if is_field_requested(self.request, "said_by_username"):
+            queryset = queryset.select_related("said_by")
         return queryset.order_by("pk")
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        parser_classes=[MultiPartParser],
+    )
+    def bulk_import(
+        self,
+        request: Request,
+        loregroup_pk: int | None = None,
+    ) -> StreamingHttpResponse:
+        """Import the quotes of an uploaded file into the group.
+
+        Expects the upload in `file`, and its `format`, which is `jsonl` by
+        default or `chat` for a chat export. Streams a JSON line with the
+        number of imported and skipped quotes after every batch, the last
+        of which has `done` set and describes the skipped lines.
+        """
+        upload = request.FILES.get("file")
+        if upload is None:
+            msg = "Expected a file"
+            raise ParseError(msg)
+        import_format = request.data.get("format", "jsonl")
+        if import_format not in IMPORT_FORMATS:
+            msg = f"Expected a format in {', '.join(IMPORT_FORMATS)}"
+            raise ParseError(msg)
+        group = LoreGroup.groups.filter(pk=loregroup_pk).first()
+        if group is None:
+            msg = "Group does not exist"
+            raise Http404(msg)
+
+        progress = import_quotes(group, upload, import_format)
+        return stream_response(
+            request,
+            (dumps(report) + b"\n" for report in progress),
+            "application/x-ndjson",
+        )
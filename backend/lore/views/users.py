@@ -1,10 +1,14 @@
 """Describes the viewsets for Lore Users."""
 
+from collections.abc import Callable
 from typing import Any, ClassVar, cast
 
 from dj_rest_auth.views import IsAuthenticated, Response
+from django.db.models import Model, Q
 from django.http import Http404, HttpRequest
-from rest_framework import filters, mixins, permissions, viewsets
+from rest_framework import mixins, permissions, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError
 from rest_framework.response import Serializer
 from rest_framework.serializers import BaseSerializer
 from rest_framework.status import (
@@ -17,77 +21,97 @@ from rest_framework.status import (
 from rest_framework.views import Request
 
 from lore import serializers
-from lore.models import Achievement, LoreGroup, LoreUser, Quote
+from lore.cache import get_user_group_ids
+from lore.models import (
+    Achievement,
+    ChallengeParticipant,
+    LoreGroup,
+    LoreUser,
+    Quote,
+)
+from lore.rows import RowListMixin, UserRowSerializer
+from lore.search import TrigramSearchFilter
 from lore.utils import GroupMemberItemPermission
 
+# The most users that can be changed by a single batch request.
+MAX_BATCH_USERS = 1000
+
+
+def get_batch_user_ids(request: Request) -> list[int]:
+    """Get the ids of the users in the `users` list of a batch request.
+
+    Raises a ParseError if it is not a list of at most `MAX_BATCH_USERS`
+    integers.
+    """
+    user_ids = request.data.get("users")
+    if (
+        not isinstance(user_ids, list)
+        or not all(type(pk) is int for pk in user_ids)
+        or len(user_ids) > MAX_BATCH_USERS
+    ):
+        msg = f"Expected a list of at most {MAX_BATCH_USERS} user ids."
+        raise ParseError(msg)
+    return user_ids
+
 
 class MutualPermission(permissions.BasePermission):
     """Restricts object permissions to users that are in the same group."""
 
+    # Query parameters that filter by an object, and the group of the object.
+    scope_params: ClassVar[dict[str, tuple[type[Model], str]]] = {
+        "member_of": (LoreGroup, "pk"),
+        "achievement": (Achievement, "group"),
+        "quote": (Quote, "group"),
+    }
+
     def has_permission(self, request, view) -> bool:
         """Restricts high level permissions to shared groups.
 
         A specific field can only be queried on if that object is actually
         known by the user. For example, if the user is not in a group, they
-        cannot filter by it.
+        cannot filter by it. Objects that do not exist are ignored.
+
+        Every filter is checked in one query, which looks for a group of the
+        filtered objects that the user is not in.
         """
         user: LoreUser = cast(LoreUser, request.user)
-        group_id = request.GET.get("member_of")
-        if group_id is not None:
-            group: LoreGroup | None = cast(
-                LoreGroup | None,
-                LoreGroup.groups.filter(pk=group_id).first(),
-            )
-            if group and not group.has_member(user):
-                return False
-
-        # user must be in the same group as the achievement
-        achievement_id = request.GET.get("achievement")
-        if achievement_id is not None:
-            achievement: Achievement = cast(
-                Achievement,
-                Achievement.achievements.filter(
-                    pk=achievement_id,
-                ).first(),
-            )
-            if achievement:
-                group: LoreGroup | None = cast(
-                    LoreGroup | None,
-                    LoreGroup.groups.filter(pk=achievement.group.pk).first(),
-                )
-                if group and not group.has_member(user):
-                    return False
-
-        quote_id = request.GET.get("quote")
-        if quote_id is not None:
-            quote: Quote = cast(
-                Quote,
-                Quote.quotes.filter(
-                    pk=quote_id,
-                ).first(),
-            )
-            if quote:
-                group: LoreGroup | None = cast(
-                    LoreGroup | None,
-                    LoreGroup.groups.filter(pk=quote.group.pk).first(),
-                )
-                if group and not group.has_member(user):
-                    return False
-
-        return True
+        scope = Q()
+        for param, (model, group_field) in self.scope_params.items():
+            object_id = request.GET.get(param)
+            if object_id is None:
+                continue
+            try:
+                object_id = int(object_id)
+            except ValueError as e:
+                msg = f"Expected an integer {param} id."
+                raise ParseError(msg) from e
+            groups = model._default_manager.filter(pk=object_id)
+            scope |= Q(pk__in=groups.values(group_field))
+
+        if not scope:
+            return True
+        return not (
+            LoreGroup.groups.filter(scope).exclude(members=user).exists()
+        )
 
     def has_object_permission(
         self,
         request: HttpRequest,
         view: viewsets.ViewSet,
-        obj: LoreUser,
+        obj: LoreUser | ChallengeParticipant,
     ) -> bool:
-        """Return true if accessing user shares a group with the object."""
+        """Return true if accessing user shares a group with the object.
+
+        Participants are checked against their user.
+        """
         user: LoreUser = cast(LoreUser, request.user)
-        if user.pk == obj.pk:
+        if isinstance(obj, ChallengeParticipant):
+            user_pk = obj.lore_user_id
+        else:
+            user_pk = obj.pk
+        if user.pk == user_pk:
             return True
-        mutual_users = user.get_mutual_users()
-        return mutual_users.filter(pk=obj.pk).exists()
+        return user.shares_group_with(user_pk)
 
 
 def create_is_owner_permission(
@@ -117,6 +141,7 @@ def create_is_owner_permission(
 
 
 class BaseLoreUserViewSet(
+    RowListMixin,
     mixins.RetrieveModelMixin,
     mixins.DestroyModelMixin,
     mixins.ListModelMixin,
@@ -129,19 +154,24 @@ class BaseLoreUserViewSet(
     Filter for who accomplished an achievement with `achievement`
     """
 
-    queryset = LoreUser.users.all().order_by("pk")
+    queryset = LoreUser.users.filter(deleted__isnull=True).order_by("pk")
     serializer_class = serializers.UserSerializer
+    row_serializer_class = UserRowSerializer
     permission_classes: ClassVar[list[type[permissions.BasePermission]]] = [
         IsAuthenticated,
         MutualPermission,
         create_is_owner_permission(["destroy", "update", "partial_update"]),
     ]
     filter_backends: ClassVar[list[type[Any]]] = [
-        filters.SearchFilter,
+        TrigramSearchFilter,
     ]
     search_fields: ClassVar[list[str]] = ["first_name", "last_name"]
     # currently, any additional fields need to be added to the MutualPermission
 
+    def perform_destroy(self, instance: LoreUser) -> None:
+        """Soft delete the user, their quotes are deleted in the background."""
+        instance.soft_delete()
+
 
 class LoreUserViewSet(
     BaseLoreUserViewSet,
@@ -149,13 +179,26 @@ class LoreUserViewSet(
 ):
     """Viewset for all lore users.
 
-    Can be searched by first and last name
+    Can be searched by first and last name, which only finds mutual users
     Filter for what group a user is in with `member_of`
     Filter for who accomplished an achievement with `achievement`
     """
 
     # currently, any additional fields need to be added to the MutualPermission
 
+    def get_queryset(self):
+        """Get the users, only those sharing a group when searching."""
+        queryset = super().get_queryset()
+        if self.request.query_params.get(TrigramSearchFilter.search_param):
+            user = cast(LoreUser, self.request.user)
+            memberships = LoreGroup.members.through.objects.filter(
+                loregroup__in=get_user_group_ids(user),
+            )
+            queryset = queryset.filter(
+                pk__in=memberships.values("loreuser"),
+            )
+        return queryset
+
 
 class MemberViewSet(BaseLoreUserViewSet):
     """Viewset for group members.
@@ -215,7 +258,7 @@ class AchievedViewSet(BaseLoreUserViewSet, mixins.CreateModelMixin):
         return queryset
 
     def get_serializer_class(self) -> type[BaseSerializer]:
-        if self.action in ["create", "delete"]:
+        if self.action in ["create", "delete", "award", "revoke"]:
             return Serializer
         return self.serializer_class
 
@@ -294,3 +337,63 @@ class AchievedViewSet(BaseLoreUserViewSet, mixins.CreateModelMixin):
             )
 
         return Response(status=HTTP_204_NO_CONTENT)
+
+    @action(detail=False, methods=["post"])
+    def award(self, request: Request, achievement_pk: int) -> Response:
+        """Add many users to the achievers at once.
+
+        Expects the ids of the users in `users`, and returns the result for
+        each of them: `awarded`, `already_achieved` or `not_member`.
+        """
+        return self.change_achievers(
+            request,
+            achievement_pk,
+            Achievement.add_achievers,
+        )
+
+    @action(detail=False, methods=["post"])
+    def revoke(self, request: Request, achievement_pk: int) -> Response:
+        """Remove many users from the achievers at once.
+
+        Expects the ids of the users in `users`, and returns the result for
+        each of them: `revoked`, `not_achieved` or `not_member`.
+        """
+        return self.change_achievers(
+            request,
+            achievement_pk,
+            Achievement.remove_achievers,
+        )
+
+    def change_achievers(
+        self,
+        request: Request,
+        achievement_pk: int,
+        change: Callable[
+            [Achievement, list[int]],
+            dict[int, Achievement.Result],
+        ],
+    ) -> Response:
+        """Apply the change to the achievers for the requested users.
+
+        Only members of the achievement's group can change its achievers.
+        """
+        user_ids = get_batch_user_ids(request)
+        user = cast(LoreUser, request.user)
+        achievement = Achievement.achievements.filter(
+            pk=achievement_pk,
+        ).first()
+        if achievement is None or not user.is_in_group(achievement.group_id):
+            return Response(
+                {"message": "Achievement does not exist"},
+                status=HTTP_404_NOT_FOUND,
+            )
+
+        results = change(achievement, user_ids)
+        return Response(
+            {
+                "results": [
+                    {"id": pk, "result": result}
+                    for pk, result in results.items()
+                ],
+            },
+        )